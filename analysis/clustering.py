@@ -1,39 +1,61 @@
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.cluster import KMeans
+from sklearn.cluster import MiniBatchKMeans
 import numpy as np
+from analysis.vectorizer import count_words
 
 
-def cluster_answers(answers, max_clusters=5):
+def cluster_answers(answers, max_clusters=5, tfidf_matrix=None):
     """
-    Groups similar answers using TF-IDF + KMeans
+    Groups similar answers using TF-IDF + MiniBatchKMeans
     Always returns multiple clusters when possible
+    Reuses tfidf_matrix (rows aligned with answers) when already vectorized
+    Identical answers are clustered once, weighted by how often they occur
     """
 
     if len(answers) < 2:
         return []
 
+    unique_answers, first_rows, inverse, counts = np.unique(
+        np.asarray(answers, dtype=object),
+        return_index=True,
+        return_inverse=True,
+        return_counts=True
+    )
+
     # If all answers are identical, return as single cluster
-    if len(set(answers)) == 1:
+    if len(unique_answers) == 1:
         return [answers]
 
-    vectorizer = TfidfVectorizer(stop_words="english")
-    
-    try:
-        X = vectorizer.fit_transform(answers)
-    except ValueError:
-        # If vectorization fails, return single cluster
-        return [answers]
+    if tfidf_matrix is not None:
+        X = tfidf_matrix[first_rows]
+        # No vocabulary terms in these answers, same as a failed vectorization
+        if X.nnz == 0:
+            return [answers]
+    else:
+        vectorizer = TfidfVectorizer(stop_words="english", dtype=np.float32)
+
+        try:
+            X = vectorizer.fit_transform(unique_answers)
+        except ValueError:
+            # If vectorization fails, return single cluster
+            return [answers]
 
     # Calculate optimal number of clusters based on data
-    unique_answers = len(set(answers))
-    n_clusters = min(max_clusters, unique_answers, len(answers))
+    n_clusters = min(max_clusters, len(unique_answers), len(answers))
     
     # Ensure at least 2 clusters if possible
     if n_clusters < 2:
         return [answers]
 
-    model = KMeans(n_clusters=n_clusters, random_state=42, n_init=10)
-    labels = model.fit_predict(X)
+    # Answer sets are small: a few mini-batch restarts converge as well as
+    # 10 full KMeans runs at a fraction of the dispatch overhead
+    model = MiniBatchKMeans(
+        n_clusters=n_clusters,
+        n_init=3,
+        batch_size=min(256, len(unique_answers)),
+        random_state=42
+    )
+    labels = model.fit_predict(X, sample_weight=counts)[inverse]
 
     # Build clusters
     clusters = {}
@@ -68,20 +90,24 @@ def split_into_groups(answers, max_groups=3):
     return [g for g in groups if g]
 
 
-def detect_weak_concepts(answers):
+def detect_weak_concepts(answers, word_counts=None, total_words=None, unique_words=None):
     """
     Simple heuristics to detect weak understanding
     """
 
     weak_signals = {}
 
+    if word_counts is None:
+        word_counts = count_words(answers)
+
     # Short answers → shallow understanding
-    short_answers = [a for a in answers if len(a.split()) <= 4]
-    weak_signals["short_answers"] = len(short_answers)
+    weak_signals["short_answers"] = int((word_counts <= 4).sum())
 
-    # Vocabulary diversity
-    all_words = " ".join(answers).split()
-    unique_ratio = len(set(all_words)) / max(len(all_words), 1)
+    # Vocabulary diversity (word totals are reused from the insights pass when given)
+    if total_words is None or unique_words is None:
+        all_words = " ".join(answers).split()
+        total_words, unique_words = len(all_words), len(set(all_words))
+    unique_ratio = unique_words / max(total_words, 1)
 
     weak_signals["low_vocab_diversity"] = unique_ratio < 0.4
 
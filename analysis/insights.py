@@ -1,26 +1,61 @@
+import re
+import heapq
 from collections import Counter
+from itertools import chain
 from sklearn.feature_extraction.text import TfidfVectorizer
-from sklearn.metrics.pairwise import cosine_similarity
 import numpy as np
+import pandas as pd
+from analysis.vectorizer import count_words
 
+NO_CONTENT_ANSWERS = frozenset(["", "n/a", "none", "idk", "don't know"])
+UNCERTAIN_PATTERN = re.compile(r"don't|does not|not sure|i think", re.IGNORECASE)
 
-def analyze_grouped_answers(grouped_data):
+
+def analyze_grouped_answers(answer_frame, tfidf_slices=None):
+    """
+    Analyze answers per question from the answer frame (see build_answer_frame).
+    When tfidf_slices (question -> rows of a shared TF-IDF matrix) is given,
+    the per-question vectorizer fit is skipped.
+    """
 
     insights = {}
 
-    for question, entries in grouped_data.items():
-        answers = [entry["answer"] for entry in entries]
+    for question, group in answer_frame.groupby("question_id", sort=False):
+        answers = group["answer"].tolist()
         total_responses = len(answers)
-        all_text = " ".join(answers).lower()
-        words = all_text.split()
-        common_words = Counter(words).most_common(5)
+        lens = group["word_count"].to_numpy()
+
+        # ---- WORD STATS (one pass) ----
+        word_counter = Counter(chain.from_iterable(a.split() for a in answers))
+        total_words = int(lens.sum())
+        unique_words = len(word_counter)
+
+        # Keywords are case-insensitive: fold the distinct words, not the text
+        keyword_counter = Counter()
+        for word, count in word_counter.items():
+            keyword_counter[word.lower()] += count
+        common_words = keyword_counter.most_common(5)
         
         # ---- TF-IDF SIMILARITY ----
         if len(answers) > 1:
-            vectorizer = TfidfVectorizer(stop_words="english")
-            tfidf_matrix = vectorizer.fit_transform(answers)
-            similarity_matrix = cosine_similarity(tfidf_matrix)
-            avg_similarity = similarity_matrix.mean()
+            if tfidf_slices is not None:
+                tfidf_matrix = tfidf_slices.get(question)
+            else:
+                vectorizer = TfidfVectorizer(stop_words="english", dtype=np.float32)
+                tfidf_matrix = vectorizer.fit_transform(answers)
+
+            if tfidf_matrix is not None:
+                # Rows are L2-normalized, so the mean of all pairwise cosines
+                # is ||sum of rows||^2 / N^2 - no N x N similarity matrix needed.
+                # The column sums come straight from the CSR arrays.
+                col_sum = np.bincount(
+                    tfidf_matrix.indices,
+                    weights=tfidf_matrix.data,
+                    minlength=tfidf_matrix.shape[1]
+                )
+                avg_similarity = float(col_sum @ col_sum) / (tfidf_matrix.shape[0] ** 2)
+            else:
+                avg_similarity = 0.0
         else:
             avg_similarity = 0.0
         
@@ -31,10 +66,10 @@ def analyze_grouped_answers(grouped_data):
         ]
         
         # ---- QUESTION DIFFICULTY ----
-        difficulty = calculate_difficulty(answers, avg_similarity)
+        difficulty = calculate_difficulty(answers, avg_similarity, lens, total_words, unique_words)
         
         # ---- COMMON MISTAKES ----
-        common_mistakes = detect_common_mistakes(entries)
+        common_mistakes = detect_common_mistakes(answers, lens)
         
         insights[question] = {
             "total_responses": total_responses,
@@ -43,15 +78,23 @@ def analyze_grouped_answers(grouped_data):
             "frequent_answers": frequent_answers,
             "difficulty": difficulty,
             "common_mistakes": common_mistakes,
+            "total_words": total_words,
+            "unique_words": unique_words,
         }
 
     return insights
 
 
-def calculate_difficulty(answers, avg_similarity):
+def calculate_difficulty(answers, avg_similarity, word_counts=None, total_words=None, unique_words=None):
     """Calculate question difficulty based on answer quality and similarity"""
-    avg_length = np.mean([len(a.split()) for a in answers]) if answers else 0
-    unique_ratio = len(set(" ".join(answers).split())) / max(len(" ".join(answers).split()), 1)
+    if word_counts is None:
+        word_counts = count_words(answers)
+    if total_words is None or unique_words is None:
+        all_words = " ".join(answers).split()
+        total_words, unique_words = len(all_words), len(set(all_words))
+
+    avg_length = word_counts.mean() if len(word_counts) else 0
+    unique_ratio = unique_words / max(total_words, 1)
     
     difficulty_score = (avg_length / 20) * 0.4 + (unique_ratio) * 0.3 + (1 - avg_similarity) * 0.3
     
@@ -63,80 +106,90 @@ def calculate_difficulty(answers, avg_similarity):
         return "Easy"
 
 
-def detect_common_mistakes(entries):
+def answer_flags(answers):
+    """
+    String checks for every answer in one pass.
+    Returns (ends_with_dot, no_content) boolean arrays.
+    """
+    flags = np.array(
+        [(a.endswith("."), a.strip().lower() in NO_CONTENT_ANSWERS) for a in answers],
+        dtype=bool
+    ).reshape(-1, 2)
+    return flags[:, 0], flags[:, 1]
+
+
+def count_mistakes(word_counts, ends_with_dot, no_content):
+    """Count every common-mistake pattern from the precomputed per-answer arrays"""
+    return {
+        "short_answer": int(np.count_nonzero(word_counts <= 3)),
+        "no_content": int(np.count_nonzero(no_content)),
+        "incomplete": int(np.count_nonzero(~ends_with_dot & (word_counts < 5))),
+    }
+
+
+def detect_common_mistakes(answers, word_counts=None):
     """Detect common mistakes in student answers"""
     mistakes = []
+
+    if word_counts is None:
+        word_counts = count_words(answers)
+
+    ends_with_dot, no_content = answer_flags(answers)
     
-    error_patterns = {
-        "short_answer": lambda a: len(a.split()) <= 3,
-        "no_content": lambda a: a.strip().lower() in ["", "n/a", "none", "idk", "don't know"],
-        "incomplete": lambda a: not a.endswith(".") and len(a.split()) < 5,
-    }
-    
-    for pattern_name, check_func in error_patterns.items():
-        count = sum(1 for e in entries if check_func(e["answer"]))
+    for pattern_name, count in count_mistakes(word_counts, ends_with_dot, no_content).items():
         if count > 0:
             mistakes.append({
                 "type": pattern_name,
                 "count": count,
-                "percentage": round(count / len(entries) * 100, 1)
+                "percentage": round(count / len(answers) * 100, 1)
             })
     
     return mistakes
 
 
-def identify_strong_weak_students(grouped_data, insights, clusters, weak_concepts):
+def identify_strong_weak_students(answer_frame, insights, clusters, weak_concepts):
     """Identify strong vs weak students based on their answers"""
-    student_scores = {}
-    
-    for question, entries in grouped_data.items():
-        for entry in entries:
-            student_id = entry["student_id"]
-            student_name = entry["student_name"]
-            answer = entry["answer"]
-            
-            if student_id not in student_scores:
-                student_scores[student_id] = {
-                    "name": student_name,
-                    "scores": [],
-                    "answer_lengths": [],
-                    "is_unique": []
-                }
-            
-            score = 0
-            answer_length = len(answer.split())
-            student_scores[student_id]["answer_lengths"].append(answer_length)
-            
-            if answer_length >= 10:
-                score += 30
-            elif answer_length >= 5:
-                score += 20
-            else:
-                score += 5
-            
-            if answer_length <= 4:
-                score -= 10
-            
-            if insights[question]["frequent_answers"]:
-                is_common = answer in insights[question]["frequent_answers"]
-                student_scores[student_id]["is_unique"].append(not is_common)
-                if not is_common:
-                    score += 20
-            
-            student_scores[student_id]["scores"].append(score)
+    answers = answer_frame["answer"].to_numpy()
+    lens = answer_frame["word_count"].to_numpy()
+
+    # Unique answers earn a bonus, but only on questions with repeated answers
+    has_frequent = np.zeros(len(answer_frame), dtype=bool)
+    is_common = np.zeros(len(answer_frame), dtype=bool)
+    for question, rows in answer_frame.groupby("question_id", sort=False).indices.items():
+        # Hash lookups instead of scanning the list for every answer
+        frequent_answers = frozenset(insights[question]["frequent_answers"])
+        if frequent_answers:
+            has_frequent[rows] = True
+            is_common[rows] = [answer in frequent_answers for answer in answers[rows]]
+
+    # Length band (30 / 20 / 5), short-answer penalty and unique-answer bonus
+    score = (
+        np.select([lens >= 10, lens >= 5], [30, 20], default=5)
+        + np.where(lens <= 4, -10, 0)
+        + np.where(has_frequent & ~is_common, 20, 0)
+    )
+
+    student_scores = pd.DataFrame({
+        "student_id": answer_frame["student_id"],
+        "name": answer_frame["student_name"],
+        "score": score,
+        "answer_length": lens
+    }).groupby("student_id", sort=False).agg(
+        name=("name", "first"),
+        avg_score=("score", "mean"),
+        avg_answer_length=("answer_length", "mean")
+    )
     
     strong_students = []
     weak_students = []
     average_students = []
     
-    for student_id, data in student_scores.items():
-        avg_score = sum(data["scores"]) / len(data["scores"]) if data["scores"] else 0
-        
+    for student_id, name, avg_score, avg_answer_length in student_scores.itertuples():
         student_data = {
             "student_id": student_id,
-            "name": data["name"],
-            "avg_score": round(avg_score, 1),
-            "avg_answer_length": round(sum(data["answer_lengths"]) / len(data["answer_lengths"]) if data["answer_lengths"] else 0, 1)
+            "name": name,
+            "avg_score": round(float(avg_score), 1),
+            "avg_answer_length": round(float(avg_answer_length), 1)
         }
         
         if avg_score >= 40:
@@ -146,13 +199,13 @@ def identify_strong_weak_students(grouped_data, insights, clusters, weak_concept
         else:
             average_students.append(student_data)
     
-    strong_students.sort(key=lambda x: x["avg_score"], reverse=True)
-    weak_students.sort(key=lambda x: x["avg_score"])
+    # Only the top 10 strong / weak students are shown; the dashboard lists
+    # every average student in order
     average_students.sort(key=lambda x: x["avg_score"], reverse=True)
     
     return {
-        "strong": strong_students[:10],
-        "weak": weak_students[:10],
+        "strong": heapq.nlargest(10, strong_students, key=lambda x: x["avg_score"]),
+        "weak": heapq.nsmallest(10, weak_students, key=lambda x: x["avg_score"]),
         "average": average_students
     }
 
@@ -164,8 +217,7 @@ def detect_conceptual_errors(grouped_data, clusters):
     for question, entries in grouped_data.items():
         error_answers = []
         for entry in entries:
-            answer_lower = entry["answer"].lower()
-            if any(neg in answer_lower for neg in ["don't", "does not", "not sure", "i think"]):
+            if UNCERTAIN_PATTERN.search(entry["answer"]):
                 if len(entry["answer"].split()) > 5:
                     error_answers.append({
                         "student_id": entry["student_id"],
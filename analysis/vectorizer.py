@@ -1,6 +1,74 @@
-from sklearn.feature_extraction.text import TfidfVectorizer
+from sklearn.feature_extraction.text import CountVectorizer, HashingVectorizer, TfidfTransformer
+import numpy as np
+import pandas as pd
+
+ANSWER_COLUMNS = ["question_id", "student_id", "student_name", "question_text", "answer"]
+
+# From this many answers on, building the vocabulary dominates vectorization;
+# hash terms into a fixed feature space instead
+HASHING_MIN_ANSWERS = 5000
+HASHING_FEATURES = 2 ** 18
+
+def count_terms(answers):
+    """Raw term counts of every answer (stop words removed), one row per answer"""
+    if len(answers) >= HASHING_MIN_ANSWERS:
+        return HashingVectorizer(
+            stop_words='english',
+            n_features=HASHING_FEATURES,
+            alternate_sign=False,
+            norm=None,
+            dtype=np.float32
+        ).transform(answers)
+
+    return CountVectorizer(stop_words='english', dtype=np.float32).fit_transform(answers)
+
 
 def vectorize_answers(answers):
-    vectorizer = TfidfVectorizer(stop_words='english')
-    vectors = vectorizer.fit_transform(answers)
+    vectors = TfidfTransformer().fit_transform(count_terms(answers))
     return vectors
+
+
+def count_words(answers):
+    """
+    Word count of every answer as an int32 array, computed once and reused
+    by the length-based heuristics instead of re-splitting each answer
+    """
+    return np.fromiter((len(a.split()) for a in answers), dtype=np.int32, count=len(answers))
+
+
+def build_answer_frame(grouped_data):
+    """
+    Flatten grouped answers into one column-oriented DataFrame, one row per
+    answer in question order, with the word count of each answer precomputed
+    """
+    frame = pd.DataFrame(
+        [
+            (question, entry["student_id"], entry["student_name"], entry["question_text"], entry["answer"])
+            for question, entries in grouped_data.items()
+            for entry in entries
+        ],
+        columns=ANSWER_COLUMNS
+    )
+    frame["word_count"] = count_words(frame["answer"])
+    return frame
+
+
+def vectorize_answer_frame(answer_frame):
+    """
+    Count terms once over every answer, then weight each question's rows with
+    IDF fitted on that question's answers alone, so similarities match a
+    per-question TF-IDF fit while the vocabulary is built only once.
+    Repeated answers are counted once and their row is shared.
+    """
+    codes, unique_answers = pd.factorize(answer_frame["answer"])
+
+    try:
+        unique_counts = count_terms(unique_answers)
+    except ValueError:
+        # Empty input or no usable vocabulary (only stop words)
+        return {}
+
+    return {
+        question: TfidfTransformer().fit_transform(unique_counts[codes[rows]])
+        for question, rows in answer_frame.groupby("question_id", sort=False).indices.items()
+    }
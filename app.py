@@ -1,17 +1,24 @@
+import io
 import os
-import json
 import uuid
-from flask import Flask, render_template, request, redirect, url_for, session, send_file, flash, jsonify
+import threading
+import orjson
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import cpu_count, get_context, parent_process
+from threadpoolctl import threadpool_limits
+from flask import Flask, render_template, request, redirect, url_for, session, send_file, flash, jsonify, Response
 from processing.parser import parse_csv, parse_json, parse_excel, parse_pdf, group_by_question
 from analysis.insights import analyze_grouped_answers, identify_strong_weak_students, detect_conceptual_errors
 from analysis.clustering import cluster_answers, detect_weak_concepts
 from analysis.summary_generator import generate_structured_summary
+from analysis.vectorizer import build_answer_frame, vectorize_answer_frame
 from feedback.feedback_generator import generate_student_feedback, generate_class_feedback, generate_improvement_suggestions
-from feedback.explainability import generate_transparency_report
+from feedback.explainability import generate_transparency_report, as_display
 from feedback.pdf_generator import create_pdf_report, generate_text_report, create_excel_report
 
 from auth.routes import auth_bp
-from db.database import init_db
+from db.database import init_db, release_connection
 
 
 # ============ HELPER FUNCTIONS FOR FILE-BASED STORAGE ============
@@ -21,42 +28,52 @@ def save_analysis_to_file(data):
     analysis_id = str(uuid.uuid4())
     filepath = os.path.join('exports', 'feedback_reports', f'analysis_{analysis_id}.json')
     
-    # Convert non-serializable objects to serializable format
-    serializable_data = make_serializable(data)
-    
-    with open(filepath, 'w', encoding='utf-8') as f:
-        json.dump(serializable_data, f)
+    # orjson handles tuples and numpy values natively; sets are written as lists
+    with open(filepath, 'wb') as f:
+        f.write(orjson.dumps(
+            data,
+            default=list,
+            option=orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+        ))
     
     return analysis_id
 
-def make_serializable(obj):
-    """Convert objects to JSON-serializable format"""
-    if isinstance(obj, dict):
-        return {k: make_serializable(v) for k, v in obj.items()}
-    elif isinstance(obj, list):
-        return [make_serializable(item) for item in obj]
-    elif isinstance(obj, (set, tuple)):
-        return list(obj)
-    else:
-        return obj
-
 def load_analysis_from_file(analysis_id):
-    """Load analysis data from file"""
+    """Load analysis data from file, reusing recently loaded analyses"""
+    return read_analysis_file(analysis_id)
+
+@lru_cache(maxsize=32)
+def read_analysis_file(analysis_id):
+    """Read and decode an analysis file (cached per analysis id)"""
     filepath = os.path.join('exports', 'feedback_reports', f'analysis_{analysis_id}.json')
     if os.path.exists(filepath):
-        with open(filepath, 'r', encoding='utf-8') as f:
-            return json.load(f)
+        with open(filepath, 'rb') as f:
+            return orjson.loads(f.read())
     return None
 
+def get_avg_insight_score(data):
+    """Average insight score of an analysis; recomputed for analyses saved before it was stored"""
+    if 'avg_insight_score' in data:
+        return data['avg_insight_score']
+    scores = data['scores']
+    if not scores:
+        return 0
+    return round(sum(s['insight_score'] for s in scores.values()) / len(scores), 2)
+
 
 app = Flask(__name__)
 app.secret_key = os.environ.get("SECRET_KEY", os.urandom(24).hex())
 
-# Ensure exports directory exists
-os.makedirs('exports/feedback_reports', exist_ok=True)
+# Analysis pool workers re-import this module under the spawn start method;
+# only the serving process creates the exports directory and the database
+if parent_process() is None:
+    # Ensure exports directory exists
+    os.makedirs('exports/feedback_reports', exist_ok=True)
+
+    init_db()
 
-init_db()
 app.register_blueprint(auth_bp)
+app.teardown_appcontext(release_connection)
 
 
 # ---------------- helper ----------------
@@ -110,6 +127,70 @@ def calculate_scores(question, insights, clusters, weak_concepts):
     return insight_score, confidence_score
 
 
+# ---------- per-question analysis ----------
+
+# Below this many questions or answers (or on a single CPU), handing the
+# work to other processes costs more than it saves
+PARALLEL_MIN_QUESTIONS = 8
+PARALLEL_MIN_ANSWERS = 2000
+
+# Worker processes are started on the first large upload and reused by every
+# later one instead of being spawned per request
+analysis_pool = None
+analysis_pool_lock = threading.Lock()
+
+
+def limit_worker_threads():
+    """Pool initializer: each KMeans call is tiny, so one BLAS/OpenMP thread per worker"""
+    threadpool_limits(limits=1)
+
+
+def get_analysis_pool():
+    """Return the shared analysis process pool, creating it on first use"""
+    global analysis_pool
+    with analysis_pool_lock:
+        if analysis_pool is None:
+            # Spawn rather than fork: forking the threaded server from a
+            # request thread can deadlock on locks held by other threads
+            analysis_pool = ProcessPoolExecutor(
+                max_workers=cpu_count(),
+                mp_context=get_context("spawn"),
+                initializer=limit_worker_threads
+            )
+    return analysis_pool
+
+
+def analyze_question(task):
+    """
+    Cluster, score, summarize and explain a single question.
+    Module-level so it can run in a multiprocessing worker.
+    """
+    q, ans, insights_q, word_counts_q, tfidf_matrix = task
+
+    clusters_q = cluster_answers(ans, tfidf_matrix=tfidf_matrix)
+    weak_q = detect_weak_concepts(
+        ans, word_counts_q, insights_q["total_words"], insights_q["unique_words"]
+    )
+
+    i, c = calculate_scores(q, insights_q, clusters_q, weak_q)
+
+    scores_q = {
+        "insight_score": i,
+        "confidence_score": c
+    }
+
+    summary_q = generate_structured_summary(q, insights_q, clusters_q, weak_q, scores_q)
+
+    # Add understanding and risk level to scores
+    scores_q["understanding_level"] = summary_q["understanding_level"]
+    scores_q["risk_level"] = summary_q["risk_level"]
+
+    # Generate transparency report for explainability
+    transparency_q = generate_transparency_report(q, insights_q, clusters_q, weak_q, scores_q)
+
+    return clusters_q, weak_q, scores_q, summary_q, transparency_q
+
+
 # ---------------- UPLOAD ----------------
 
 @app.route("/upload", methods=["POST"])
@@ -135,22 +216,16 @@ def upload():
         return render_template("index.html", error="Invalid file format. Please upload CSV, JSON, Excel (.xlsx), or PDF files.")
 
     grouped_data = group_by_question(data)
-    insights = analyze_grouped_answers(grouped_data)
 
-    # Calculate total students
-    all_students = set()
-    for rows in grouped_data.values():
-        for row in rows:
-            all_students.add(row["student_id"])
-    total_students = len(all_students)
+    # Column-oriented copy of the answers (with word counts) for the analysis
+    answer_frame = build_answer_frame(grouped_data)
 
-    # Calculate overall average similarity
-    if insights:
-        overall_avg_similarity = round(
-            sum(i["avg_similarity"] for i in insights.values()) / len(insights), 2
-        )
-    else:
-        overall_avg_similarity = 0
+    # Fit TF-IDF once for every question; insights and clustering share the rows
+    tfidf_slices = vectorize_answer_frame(answer_frame)
+    insights = analyze_grouped_answers(answer_frame, tfidf_slices)
+
+    # Calculate total students
+    total_students = answer_frame["student_id"].nunique()
 
     clusters = {}
     weak_concepts = {}
@@ -159,59 +234,70 @@ def upload():
     transparency_reports = {}
     student_feedback = {}
 
-    # Group data by student for individual feedback
+    # Questions are independent: large uploads fan them out across processes
+    tasks = [
+        (q, group["answer"].tolist(), insights[q], group["word_count"].to_numpy(), tfidf_slices.get(q))
+        for q, group in answer_frame.groupby("question_id", sort=False)
+    ]
+
+    use_pool = (
+        cpu_count() > 1
+        and len(tasks) >= PARALLEL_MIN_QUESTIONS
+        and len(answer_frame) >= PARALLEL_MIN_ANSWERS
+    )
+    if use_pool:
+        results = list(get_analysis_pool().map(analyze_question, tasks))
+    else:
+        # Each KMeans call is tiny: one BLAS/OpenMP thread avoids paying
+        # thread pool spin-up per call
+        with threadpool_limits(limits=1):
+            results = [analyze_question(task) for task in tasks]
+
+    # Collect results and aggregate the similarity distribution and the
+    # overall averages in the same pass
+    similarity_distribution = {'high': 0, 'medium': 0, 'low': 0}
+    similarity_total = 0
+    insight_score_total = 0
+    for (q, *_), result in zip(tasks, results):
+        clusters[q], weak_concepts[q], scores[q], summaries[q], transparency_reports[q] = result
+
+        avg_similarity = insights[q]['avg_similarity']
+        similarity_total += avg_similarity
+        if avg_similarity > 0.6:
+            similarity_distribution['high'] += 1
+        elif avg_similarity > 0.3:
+            similarity_distribution['medium'] += 1
+        else:
+            similarity_distribution['low'] += 1
+        insight_score_total += scores[q]['insight_score']
+
+    overall_avg_similarity = round(similarity_total / len(tasks), 2) if tasks else 0
+    avg_insight_score = round(insight_score_total / len(tasks), 2) if tasks else 0
+
+    # Group data by student for individual feedback, attaching each
+    # question's analysis so feedback only reads the student's own slice.
+    # Frequent answers are hashed once per question for O(1) lookups
     student_data = {}
     for q_id, rows in grouped_data.items():
+        q_data = (
+            insights[q_id], clusters[q_id], weak_concepts[q_id],
+            frozenset(insights[q_id]["frequent_answers"])
+        )
         for row in rows:
             student_id = row["student_id"]
             if student_id not in student_data:
                 student_data[student_id] = {
                     "student_id": student_id,
                     "student_name": row["student_name"],
-                    "answers": {}
+                    "answers": {},
+                    "q_data": {}
                 }
             student_data[student_id]["answers"][q_id] = row["answer"]
-
-    for q, rows in grouped_data.items():
-        ans = [r["answer"] for r in rows]
-
-        clusters[q] = cluster_answers(ans)
-        weak_concepts[q] = detect_weak_concepts(ans)
-
-        i, c = calculate_scores(
-            q,
-            insights[q],
-            clusters[q],
-            weak_concepts[q]
-        )
-
-        scores[q] = {
-            "insight_score": i,
-            "confidence_score": c
-        }
-
-        summaries[q] = generate_structured_summary(
-            q,
-            insights[q],
-            clusters[q],
-            weak_concepts[q],
-            scores[q]
-        )
-
-        # Add understanding and risk level to scores
-        scores[q]["understanding_level"] = summaries[q]["understanding_level"]
-        scores[q]["risk_level"] = summaries[q]["risk_level"]
-
-        # Generate transparency report for explainability
-        transparency_reports[q] = generate_transparency_report(
-            q, insights[q], clusters[q], weak_concepts[q], scores[q]
-        )
+            student_data[student_id]["q_data"][q_id] = q_data
 
     # Generate student-level feedback
     for student_id, s_data in student_data.items():
-        student_feedback[student_id] = generate_student_feedback(
-            s_data, insights, clusters, weak_concepts
-        )
+        student_feedback[student_id] = generate_student_feedback(s_data)
 
     # Generate class-level feedback
     class_feedback = generate_class_feedback(
@@ -222,16 +308,11 @@ def upload():
     improvement_suggestions = generate_improvement_suggestions(weak_concepts, insights)
 
     # NEW: Identify strong vs weak students
-    student_classification = identify_strong_weak_students(grouped_data, insights, clusters, weak_concepts)
+    student_classification = identify_strong_weak_students(answer_frame, insights, clusters, weak_concepts)
 
     # NEW: Detect conceptual errors
     conceptual_errors = detect_conceptual_errors(grouped_data, clusters)
 
-    # NEW: Calculate similarity distribution for chart
-    similarity_high = sum(1 for i in insights.values() if i['avg_similarity'] > 0.6)
-    similarity_medium = sum(1 for i in insights.values() if 0.3 < i['avg_similarity'] <= 0.6)
-    similarity_low = sum(1 for i in insights.values() if i['avg_similarity'] <= 0.3)
-
     # Store data in file for large datasets
     analysis_data = {
         'grouped_data': grouped_data,
@@ -242,17 +323,14 @@ def upload():
         'summaries': summaries,
         'total_students': total_students,
         'overall_avg_similarity': overall_avg_similarity,
+        'avg_insight_score': avg_insight_score,
         'transparency_reports': transparency_reports,
         'student_feedback': student_feedback,
         'class_feedback': class_feedback,
         'improvement_suggestions': improvement_suggestions,
         'student_classification': student_classification,
         'conceptual_errors': conceptual_errors,
-        'similarity_distribution': {
-            'high': similarity_high,
-            'medium': similarity_medium,
-            'low': similarity_low
-        }
+        'similarity_distribution': similarity_distribution
     }
     
     # Save to file and store only the ID in session
@@ -276,11 +354,7 @@ def upload():
         improvement_suggestions=improvement_suggestions,
         student_classification=student_classification,
         conceptual_errors=conceptual_errors,
-        similarity_distribution={
-            'high': similarity_high,
-            'medium': similarity_medium,
-            'low': similarity_low
-        }
+        similarity_distribution=similarity_distribution
     )
 
 
@@ -308,9 +382,7 @@ def export_pdf():
             'total_students': data['total_students'],
             'total_questions': len(data['grouped_data']),
             'overall_similarity': data['overall_avg_similarity'],
-            'avg_insight_score': round(
-                sum(s['insight_score'] for s in data['scores'].values()) / len(data['scores']), 2
-            ) if data['scores'] else 0
+            'avg_insight_score': get_avg_insight_score(data)
         },
         'questions': {}
     }
@@ -331,12 +403,18 @@ def export_pdf():
     # Generate filename
     from datetime import datetime
     filename = f"assignment_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.pdf"
-    output_path = os.path.join('exports/feedback_reports', filename)
 
     # Create PDF
-    create_pdf_report(pdf_data, output_path, session['teacher_name'])
-
-    return send_file(output_path, as_attachment=True, download_name=filename)
+    buffer = io.BytesIO()
+    create_pdf_report(pdf_data, buffer, session['teacher_name'])
+    buffer.seek(0)
+
+    return send_file(
+        buffer,
+        mimetype='application/pdf',
+        as_attachment=True,
+        download_name=filename
+    )
 
 
 # ---------------- EXPORT TEXT ----------------
@@ -363,9 +441,7 @@ def export_text():
             'total_students': data['total_students'],
             'total_questions': len(data['grouped_data']),
             'overall_similarity': data['overall_avg_similarity'],
-            'avg_insight_score': round(
-                sum(s['insight_score'] for s in data['scores'].values()) / len(data['scores']), 2
-            ) if data['scores'] else 0
+            'avg_insight_score': get_avg_insight_score(data)
         },
         'questions': {}
     }
@@ -386,12 +462,18 @@ def export_text():
     # Generate filename
     from datetime import datetime
     filename = f"assignment_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.txt"
-    output_path = os.path.join('exports/feedback_reports', filename)
 
     # Create text report
-    generate_text_report(text_data, output_path, session['teacher_name'])
-
-    return send_file(output_path, as_attachment=True, download_name=filename)
+    buffer = io.BytesIO()
+    generate_text_report(text_data, buffer, session['teacher_name'])
+    buffer.seek(0)
+
+    return send_file(
+        buffer,
+        mimetype='text/plain',
+        as_attachment=True,
+        download_name=filename
+    )
 
 
 # ---------------- EXPORT EXCEL ----------------
@@ -418,9 +500,7 @@ def export_excel():
             'total_students': data['total_students'],
             'total_questions': len(data['grouped_data']),
             'overall_similarity': data['overall_avg_similarity'],
-            'avg_insight_score': round(
-                sum(s['insight_score'] for s in data['scores'].values()) / len(data['scores']), 2
-            ) if data['scores'] else 0
+            'avg_insight_score': get_avg_insight_score(data)
         },
         'questions': {}
     }
@@ -441,12 +521,18 @@ def export_excel():
     # Generate filename
     from datetime import datetime
     filename = f"assignment_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}.xlsx"
-    output_path = os.path.join('exports/feedback_reports', filename)
 
     # Create Excel report
-    create_excel_report(excel_data, output_path, session['teacher_name'])
-
-    return send_file(output_path, as_attachment=True, download_name=filename)
+    buffer = io.BytesIO()
+    create_excel_report(excel_data, buffer, session['teacher_name'])
+    buffer.seek(0)
+
+    return send_file(
+        buffer,
+        mimetype='application/vnd.openxmlformats-officedocument.spreadsheetml.sheet',
+        as_attachment=True,
+        download_name=filename
+    )
 
 
 # ---------------- SAVE FEEDBACK (EDIT/APPROVE) ----------------
@@ -469,11 +555,12 @@ def save_feedback():
     new_feedback = request_data.get('feedback')
 
     if question_id and new_feedback:
-        # Update data
-        data['summaries'][question_id]['teaching_action'] = new_feedback
+        # Update data (copy what changes, the loaded analysis is a shared cached object)
+        summaries = dict(data['summaries'])
+        summaries[question_id] = dict(summaries[question_id], teaching_action=new_feedback)
         
         # Save back to file
-        save_analysis_to_file(data)
+        save_analysis_to_file(dict(data, summaries=summaries))
         
         return jsonify({"success": True, "message": "Feedback updated successfully"})
 
@@ -497,7 +584,11 @@ def get_transparency(question_id):
 
     transparency = data.get('transparency_reports', {}).get(question_id)
     if transparency:
-        return jsonify(transparency)
+        # Reports are plain dicts/lists: let orjson encode them directly
+        return Response(
+            orjson.dumps(as_display(transparency), option=orjson.OPT_NON_STR_KEYS),
+            mimetype='application/json'
+        )
     return jsonify({"error": "Data not found"})
 
 
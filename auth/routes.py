@@ -1,9 +1,14 @@
-from flask import Blueprint, render_template, request, redirect, url_for, session
+from flask import Blueprint, render_template, request, redirect, url_for, session, flash
 import sqlite3
-from db.database import get_connection, hash_password
+from db.database import get_connection, hash_password, verify_password, needs_rehash, dummy_password_hash
 
 auth_bp = Blueprint("auth", __name__)
 
+# SQL used by the auth routes, kept in one place for readability
+SELECT_TEACHER = "SELECT id, name, ps_id, password FROM teachers WHERE email=?"
+UPDATE_PASSWORD = "UPDATE teachers SET password=? WHERE id=?"
+INSERT_TEACHER = "INSERT INTO teachers(ps_id, name, email, password) VALUES(?,?,?,?)"
+
 # ---------------- LOGIN ----------------
 
 @auth_bp.route("/login", methods=["GET","POST"])
@@ -11,28 +16,33 @@ def login():
     if request.method == "POST":
         email = request.form["email"]
         password = request.form["password"]
-        
-        # Hash the password for comparison
-        hashed_password = hash_password(password)
 
         conn = get_connection()
         cur = conn.cursor()
 
-        cur.execute(
-            "SELECT id, name, ps_id FROM teachers WHERE email=? AND password=?",
-            (email, hashed_password)
-        )
+        # Look up by email only; the salted hash is verified in Python
+        cur.execute(SELECT_TEACHER, (email,))
 
         row = cur.fetchone()
-        conn.close()
 
-        if row:
+        if row is None:
+            # Unknown email: verify against a dummy hash anyway so the
+            # response time doesn't reveal which emails are registered
+            verify_password(dummy_password_hash(), password)
+        elif verify_password(row[3], password):
+            # Upgrade legacy SHA-256 hashes on successful login
+            if needs_rehash(row[3]):
+                with conn:
+                    cur.execute(UPDATE_PASSWORD, (hash_password(password), row[0]))
+
             session["teacher_id"] = row[0]
             session["teacher_name"] = row[1]
             session["ps_id"] = row[2]
             return redirect(url_for("index"))
 
-        return render_template("login.html", error="Invalid email or password")
+        # Cheap redirect on failure; the GET renders the flashed error
+        flash("Invalid email or password", "error")
+        return redirect(url_for("auth.login"))
 
     return render_template("login.html")
 
@@ -54,13 +64,8 @@ def register():
             conn = get_connection()
             cur = conn.cursor()
 
-            cur.execute(
-                "INSERT INTO teachers(ps_id, name, email, password) VALUES(?,?,?,?)",
-                (ps_id, name, email, hashed_password)
-            )
-
-            conn.commit()
-            conn.close()
+            with conn:
+                cur.execute(INSERT_TEACHER, (ps_id, name, email, hashed_password))
 
             return redirect(url_for("auth.login"))
 
@@ -1,29 +1,97 @@
 import sqlite3
 import hashlib
+import hmac
+import queue
+from functools import lru_cache
+from flask import g
+from argon2 import PasswordHasher
+from argon2.exceptions import VerificationError, InvalidHashError
 
 DB_NAME = "teachers.db"
 
+# Salted, memory-hard hashing; the cost parameters set the verification time
+password_hasher = PasswordHasher(time_cost=2, memory_cost=64 * 1024, parallelism=1)
+
+# Open connections kept for reuse across requests in this process; each is
+# checked out by one request at a time and returned at teardown
+DB_POOL_SIZE = 8
+connection_pool = queue.Queue(maxsize=DB_POOL_SIZE)
+
+def connect():
+    """Open a connection with the per-connection settings applied"""
+    # Pooled connections are handed from one request thread to the next,
+    # never used by two threads at once
+    conn = sqlite3.connect(DB_NAME, check_same_thread=False)
+    conn.executescript("""
+        PRAGMA synchronous=NORMAL;
+        PRAGMA temp_store=MEMORY;
+        PRAGMA cache_size=-64000;
+    """)
+    return conn
+
 def get_connection():
-    return sqlite3.connect(DB_NAME)
+    """Connection of the current request, checked out of the pool on first use"""
+    if "db" not in g:
+        try:
+            g.db = connection_pool.get_nowait()
+        except queue.Empty:
+            g.db = connect()
+    return g.db
+
+def release_connection(exception=None):
+    """App-context teardown: return the request's connection to the pool"""
+    conn = g.pop("db", None)
+    if conn is None:
+        return
+    if conn.in_transaction:
+        conn.rollback()
+    try:
+        connection_pool.put_nowait(conn)
+    except queue.Full:
+        conn.close()
 
 def hash_password(password):
-    """Hash password using SHA-256"""
-    return hashlib.sha256(password.encode()).hexdigest()
+    """Hash password using Argon2id"""
+    return password_hasher.hash(password)
 
-def init_db():
-    conn = get_connection()
-    cur = conn.cursor()
-
-    cur.execute("""
-        CREATE TABLE IF NOT EXISTS teachers (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            ps_id TEXT UNIQUE NOT NULL,
-            name TEXT NOT NULL,
-            email TEXT UNIQUE NOT NULL,
-            password TEXT NOT NULL,
-            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-        )
-    """)
+@lru_cache(maxsize=1)
+def dummy_password_hash():
+    """
+    Hash verified against when the email is unknown, so failed logins cost
+    the same; computed on first use rather than at import
+    """
+    return password_hasher.hash("dummy-password")
+
+def verify_password(stored_hash, password):
+    """Check a password against a stored Argon2 or legacy SHA-256 hash"""
+    if not stored_hash.startswith("$argon2"):
+        # Accounts registered before Argon2 hold an unsalted SHA-256 hex digest
+        return hmac.compare_digest(hashlib.sha256(password.encode('utf-8')).digest().hex(), stored_hash)
+    try:
+        return password_hasher.verify(stored_hash, password)
+    except (VerificationError, InvalidHashError):
+        return False
 
-    conn.commit()
+def needs_rehash(stored_hash):
+    """Whether a stored hash is legacy SHA-256 or uses outdated Argon2 parameters"""
+    return not stored_hash.startswith("$argon2") or password_hasher.check_needs_rehash(stored_hash)
+
+def init_db():
+    conn = connect()
+    # WAL is a property of the database file, so it is set once here
+    conn.execute("PRAGMA journal_mode=WAL")
+    with conn:
+        conn.execute("""
+            CREATE TABLE IF NOT EXISTS teachers (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                ps_id TEXT UNIQUE NOT NULL,
+                name TEXT NOT NULL,
+                email TEXT UNIQUE NOT NULL,
+                password TEXT NOT NULL,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        # The login lookup uses the UNIQUE email index; remove the unused
+        # covering index from databases that already created it
+        conn.execute("DROP INDEX IF EXISTS idx_teachers_email_cov")
     conn.close()
@@ -3,42 +3,92 @@ Explainability Module
 Provides transparency in AI output - explains why insights were generated
 """
 
-def explain_cluster_selection(cluster, all_answers, threshold=0.3):
+from enum import IntEnum
+import numpy as np
+
+
+class Classification(IntEnum):
+    """
+    How common a cluster's answer pattern is. Stored as a small int in the
+    reports; as_display maps it to its label at the API boundary
+    """
+    LESS_COMMON = 0
+    MODERATELY_COMMON = 1
+    HIGHLY_COMMON = 2
+
+
+# Display label and explanation per Classification
+CLASSIFICATION_LABELS = ("Less Common", "Moderately Common", "Highly Common")
+CLUSTER_EXPLANATIONS = (
+    "Fewer students shared this answer pattern.",
+    "Several students shared this answer pattern.",
+    "This answer pattern is shared by a large portion of the class."
+)
+
+
+def cluster_band_codes(percentages):
+    """
+    Band code of each class percentage: 2 above 40%, 1 above 20%, 0 otherwise
+    
+    Args:
+        percentages: Array of class percentages
+    
+    Returns:
+        int8 array of Classification codes
+    """
+    percentages = np.asarray(percentages)
+    return (percentages > 40).astype(np.int8) + (percentages > 20)
+
+
+def explain_cluster_selection(cluster, total_answers, threshold=0.3):
     """
     Explain why answers were grouped in a cluster
     
     Args:
         cluster: List of answers in the cluster
-        all_answers: All student answers
+        total_answers: Number of student answers
         threshold: Similarity threshold
     
     Returns:
         Explanation dictionary
     """
-    cluster_size = len(cluster)
-    total_answers = len(all_answers)
+    return explain_cluster_selections([cluster], total_answers)[0]
+
+
+def explain_cluster_selections(clusters, total_answers):
+    """
+    Explain every cluster of a question at once, banding all clusters in a
+    single vectorized pass
     
-    # Calculate what percentage of class shares this answer pattern
-    percentage = round((cluster_size / total_answers) * 100, 1) if total_answers > 0 else 0
+    Args:
+        clusters: List of clusters (each a list of answers)
+        total_answers: Number of answers the percentages are relative to
     
-    # Determine if this is a common or rare pattern
-    if percentage > 40:
-        classification = "Highly Common"
-        explanation = "This answer pattern is shared by a large portion of the class."
-    elif percentage > 20:
-        classification = "Moderately Common"
-        explanation = "Several students shared this answer pattern."
+    Returns:
+        List of explanation dictionaries, one per cluster
+    """
+    sizes = [len(cluster) for cluster in clusters]
+    
+    # Calculate what percentage of class shares each answer pattern
+    if total_answers > 0:
+        percentages = np.round(np.array(sizes) / total_answers * 100, 1).tolist()
     else:
-        classification = "Less Common"
-        explanation = "Fewer students shared this answer pattern."
+        percentages = [0] * len(clusters)
     
-    return {
-        'cluster_size': cluster_size,
-        'class_percentage': percentage,
-        'classification': classification,
-        'explanation': explanation,
-        'sample_answers': cluster[:3] if len(cluster) > 3 else cluster
-    }
+    # Determine if each is a common or rare pattern
+    codes = cluster_band_codes(percentages)
+    
+    explanations = []
+    for cluster, cluster_size, percentage, code in zip(clusters, sizes, percentages, codes):
+        explanations.append({
+            'cluster_size': cluster_size,
+            'class_percentage': percentage,
+            'classification': Classification(code),
+            'explanation': CLUSTER_EXPLANATIONS[code],
+            'sample_answers': cluster[:3] if len(cluster) > 3 else cluster
+        })
+    
+    return explanations
 
 
 def explain_weak_concept(concept_type, count, total, threshold_ratio=0.2):
@@ -86,6 +136,24 @@ def explain_weak_concept(concept_type, count, total, threshold_ratio=0.2):
     }
 
 
+# Similarity band edges: <= 0.3 low, <= 0.6 moderate, above high
+# (band index from np.digitize(..., right=True))
+SIMILARITY_BINS = np.array([0.3, 0.6])
+
+# (interpretation, meaning, confidence) per similarity band
+SIMILARITY_BANDS = (
+    ("Low Similarity",
+     "Students gave diverse answers - may indicate confusion or unique interpretations.",
+     "Medium"),
+    ("Moderate Similarity",
+     "Students showed variation in their answers with some common patterns.",
+     "Medium"),
+    ("High Similarity",
+     "Students gave very similar answers - either due to memorization or clear understanding of the concept.",
+     "High")
+)
+
+
 def explain_similarity_score(similarity_score):
     """
     Explain what a similarity score means
@@ -96,28 +164,35 @@ def explain_similarity_score(similarity_score):
     Returns:
         Explanation dictionary
     """
-    score_percentage = round(similarity_score * 100, 1)
+    return explain_similarity_scores([similarity_score])[0]
+
+
+def explain_similarity_scores(similarity_scores):
+    """
+    Explain a batch of similarity scores, banding them all with one
+    np.digitize call
     
-    if similarity_score > 0.6:
-        interpretation = "High Similarity"
-        meaning = "Students gave very similar answers - either due to memorization or clear understanding of the concept."
-        confidence = "High"
-    elif similarity_score > 0.3:
-        interpretation = "Moderate Similarity"
-        meaning = "Students showed variation in their answers with some common patterns."
-        confidence = "Medium"
-    else:
-        interpretation = "Low Similarity"
-        meaning = "Students gave diverse answers - may indicate confusion or unique interpretations."
-        confidence = "Medium"
+    Args:
+        similarity_scores: Sequence of TF-IDF similarity scores (0-1)
     
-    return {
-        'score': similarity_score,
-        'score_percentage': score_percentage,
-        'interpretation': interpretation,
-        'meaning': meaning,
-        'confidence': confidence
-    }
+    Returns:
+        List of explanation dictionaries, one per score
+    """
+    bands = np.digitize(similarity_scores, SIMILARITY_BINS, right=True)
+    score_percentages = np.round(np.asarray(similarity_scores, dtype=np.float64) * 100, 1).tolist()
+    
+    explanations = []
+    for similarity_score, score_percentage, band in zip(similarity_scores, score_percentages, bands):
+        interpretation, meaning, confidence = SIMILARITY_BANDS[band]
+        explanations.append({
+            'score': similarity_score,
+            'score_percentage': score_percentage,
+            'interpretation': interpretation,
+            'meaning': meaning,
+            'confidence': confidence
+        })
+    
+    return explanations
 
 
 def explain_insight_score(insight_score, confidence_score):
@@ -191,11 +266,9 @@ def generate_transparency_report(question, insights, clusters, weak_concepts, sc
     
     # Explain each cluster
     if clusters:
-        for i, cluster in enumerate(clusters):
-            cluster_exp = explain_cluster_selection(
-                cluster,
-                insights.get('frequent_answers', []) + [c for c_list in clusters for c in c_list]
-            )
+        # Only the size of frequent + clustered answers is needed, not the list
+        total_answers = len(insights.get('frequent_answers', ())) + sum(map(len, clusters))
+        for i, cluster_exp in enumerate(explain_cluster_selections(clusters, total_answers)):
             cluster_exp['cluster_id'] = i + 1
             report['cluster_explanations'].append(cluster_exp)
     
@@ -209,3 +282,31 @@ def generate_transparency_report(question, insights, clusters, weak_concepts, sc
                 )
     
     return report
+
+
+def as_display(report):
+    """
+    Copy of a transparency report with cluster classifications mapped to
+    their display labels
+    
+    Args:
+        report: Transparency report (classifications as Classification codes,
+            or as labels in analyses saved before the codes were introduced)
+    
+    Returns:
+        Report dictionary ready to serialize for the UI
+    """
+    return dict(
+        report,
+        cluster_explanations=[
+            dict(cluster_exp, classification=classification_label(cluster_exp['classification']))
+            for cluster_exp in report.get('cluster_explanations', [])
+        ]
+    )
+
+
+def classification_label(classification):
+    """Display label of a Classification code; labels are returned unchanged"""
+    if isinstance(classification, str):
+        return classification
+    return CLASSIFICATION_LABELS[classification]
@@ -3,40 +3,58 @@ Feedback Generator Module
 Generates student-level and class-level feedback drafts
 """
 
-def generate_student_feedback(student_data, question_insights, clusters, weak_concepts):
+from dataclasses import dataclass
+import numpy as np
+from feedback.explainability import SIMILARITY_BINS
+
+# Class recommendation by understanding band (>= 75, >= 50, below)
+RECOMMENDATIONS = (
+    "Class shows strong understanding. Proceed to next topic with minor reinforcement.",
+    "Moderate understanding. Review key concepts with examples.",
+    "Review required. Consider re-teaching with guided practice."
+)
+
+# Per-question data for a question the student has no analysis for
+NO_QUESTION_DATA = ({}, [], {}, frozenset())
+
+# (pattern_status, suggestion) per similarity band (low, moderate, high)
+STUDENT_PATTERNS = (
+    ("unique perspective", "Your answer provides a unique perspective."),
+    ("moderate variation", "Your answer shows some variation from the common pattern."),
+    ("common answer pattern", "Your answer follows the common pattern observed in class.")
+)
+
+
+def generate_student_feedback(student_data):
     """
     Generate individualized feedback for a student
     
     Args:
-        student_data: Dictionary with student info and their answers
-        question_insights: Insights for each question
-        clusters: Answer clusters
-        weak_concepts: Weak concepts detected
+        student_data: Dictionary with student info, their answers and the
+            precomputed (insights, clusters, weak_concepts, frequent answer
+            set) of each question they answered under 'q_data'
     
     Returns:
         Dictionary with feedback for each question
     """
     feedback = {}
+    q_data = student_data.get('q_data', {})
+    answers = student_data.get('answers', {})
+    rows = [q_data.get(q_id, NO_QUESTION_DATA) for q_id in answers]
     
-    for q_id, answer in student_data.get('answers', {}).items():
-        insights = question_insights.get(q_id, {})
-        
+    # Check answer similarity: band every answered question at once
+    avg_sims = [row[0].get('avg_similarity', 0) for row in rows]
+    bands = np.digitize(avg_sims, SIMILARITY_BINS, right=True)
+    avg_sim_percentages = np.round(np.asarray(avg_sims, dtype=np.float64) * 100, 1).tolist()
+    
+    for (q_id, answer), (insights, _, _, frequent_answers), avg_sim_percentage, band in zip(
+        answers.items(), rows, avg_sim_percentages, bands
+    ):
         # Determine if answer matches common patterns
-        is_common = answer in insights.get('frequent_answers', [])
-        
-        # Check answer similarity
-        avg_sim = insights.get('avg_similarity', 0)
+        is_common = answer in frequent_answers
         
         # Generate feedback based on analysis
-        if avg_sim > 0.6:
-            pattern_status = "common answer pattern"
-            suggestion = "Your answer follows the common pattern observed in class."
-        elif avg_sim > 0.3:
-            pattern_status = "moderate variation"
-            suggestion = "Your answer shows some variation from the common pattern."
-        else:
-            pattern_status = "unique perspective"
-            suggestion = "Your answer provides a unique perspective."
+        pattern_status, suggestion = STUDENT_PATTERNS[band]
         
         feedback[q_id] = {
             'answer': answer,
@@ -44,12 +62,67 @@ def generate_student_feedback(student_data, question_insights, clusters, weak_co
             'suggestion': suggestion,
             'is_common': is_common,
             'total_responses': insights.get('total_responses', 0),
-            'class_avg_similarity': round(avg_sim * 100, 1)
+            'class_avg_similarity': avg_sim_percentage
         }
     
     return feedback
 
 
+@dataclass(slots=True)
+class QuestionRecord:
+    """Everything the class-wide passes need about one question, in one object"""
+    q_id: str
+    question_text: str
+    total_responses: int
+    avg_similarity: float
+    frequent_answers: tuple
+    common_words: list
+    short_answers: int
+    low_vocab: bool
+    insight_score: float
+    confidence_score: float
+    understanding_level: str
+    risk_level: str
+    clusters_count: int
+
+
+def build_question_records(grouped_data, insights, clusters, weak_concepts, scores):
+    """
+    Merge the per-question analysis dicts into one QuestionRecord per question
+    
+    Args:
+        grouped_data: Grouped student answers by question
+        insights: Analysis insights
+        clusters: Answer clusters
+        weak_concepts: Weak concepts
+        scores: Calculated scores
+    
+    Returns:
+        List of QuestionRecord in question order
+    """
+    records = []
+    for q_id, entries in grouped_data.items():
+        insights_q = insights.get(q_id, {})
+        weak_q = weak_concepts.get(q_id, {})
+        score_q = scores.get(q_id, {})
+        records.append(QuestionRecord(
+            q_id=q_id,
+            question_text=entries[0].get('question_text', f'Question {q_id}'),
+            total_responses=insights_q.get('total_responses', 0),
+            avg_similarity=insights_q.get('avg_similarity', 0),
+            frequent_answers=tuple(insights_q.get('frequent_answers', ())),
+            common_words=insights_q.get('common_words', []),
+            short_answers=weak_q.get('short_answers', 0),
+            low_vocab=weak_q.get('low_vocab_diversity', False),
+            insight_score=score_q.get('insight_score', 0),
+            confidence_score=score_q.get('confidence_score', 0),
+            understanding_level=score_q.get('understanding_level', 'Unknown'),
+            risk_level=score_q.get('risk_level', 'Low'),
+            clusters_count=len(clusters.get(q_id, {}))
+        ))
+    return records
+
+
 def generate_class_feedback(grouped_data, insights, clusters, weak_concepts, scores):
     """
     Generate class-level feedback summary
@@ -66,53 +139,56 @@ def generate_class_feedback(grouped_data, insights, clusters, weak_concepts, sco
     """
     class_feedback = {}
     
-    for q_id in grouped_data.keys():
-        insights_q = insights.get(q_id, {})
-        clusters_q = clusters.get(q_id, {})
-        weak_q = weak_concepts.get(q_id, {})
-        score_q = scores.get(q_id, {})
-        
-        # Calculate class performance
-        understanding = score_q.get('insight_score', 0)
-        confidence = score_q.get('confidence_score', 0)
-        risk = score_q.get('risk_level', 'Low')
-        
+    records = build_question_records(grouped_data, insights, clusters, weak_concepts, scores)
+    
+    # Band every question's understanding score in one vectorized pass
+    understanding = np.fromiter(
+        (record.insight_score for record in records),
+        dtype=np.float64,
+        count=len(records)
+    )
+    recommendation_bands = np.select([understanding >= 75, understanding >= 50], [0, 1], default=2)
+    
+    # Similarity percentages for every question in one call
+    avg_similarities = np.fromiter(
+        (record.avg_similarity for record in records),
+        dtype=np.float64,
+        count=len(records)
+    )
+    similarity_percentages = np.round(avg_similarities * 100, 1).tolist()
+    
+    for record, band, similarity_percentage in zip(records, recommendation_bands, similarity_percentages):
         # Generate teaching points
         teaching_points = []
         
-        if weak_q.get('short_answers', 0) > 0:
+        if record.short_answers > 0:
             teaching_points.append(
-                f"{weak_q['short_answers']} students gave short answers - encourage detailed explanations"
+                f"{record.short_answers} students gave short answers - encourage detailed explanations"
             )
         
-        if weak_q.get('low_vocab_diversity', False):
+        if record.low_vocab:
             teaching_points.append(
                 "Limited vocabulary diversity observed - consider vocabulary-building activities"
             )
         
-        if insights_q.get('frequent_answers'):
+        if record.frequent_answers:
             teaching_points.append(
-                f"{len(insights_q['frequent_answers'])} common answer patterns detected"
+                f"{len(record.frequent_answers)} common answer patterns detected"
             )
         
         # Overall recommendation
-        if understanding >= 75:
-            recommendation = "Class shows strong understanding. Proceed to next topic with minor reinforcement."
-        elif understanding >= 50:
-            recommendation = "Moderate understanding. Review key concepts with examples."
-        else:
-            recommendation = "Review required. Consider re-teaching with guided practice."
+        recommendation = RECOMMENDATIONS[band]
         
-        class_feedback[q_id] = {
-            'question': grouped_data[q_id][0].get('question_text', f'Question {q_id}'),
-            'total_responses': insights_q.get('total_responses', 0),
-            'understanding_level': score_q.get('understanding_level', 'Unknown'),
-            'risk_level': risk,
+        class_feedback[record.q_id] = {
+            'question': record.question_text,
+            'total_responses': record.total_responses,
+            'understanding_level': record.understanding_level,
+            'risk_level': record.risk_level,
             'recommendation': recommendation,
             'teaching_points': teaching_points,
-            'avg_similarity': round(insights_q.get('avg_similarity', 0) * 100, 1),
-            'common_keywords': [w for w, c in insights_q.get('common_words', [])[:5]],
-            'clusters_count': len(clusters_q)
+            'avg_similarity': similarity_percentage,
+            'common_keywords': [w for w, c in record.common_words[:5]],
+            'clusters_count': record.clusters_count
         }
     
     return class_feedback
@@ -131,8 +207,13 @@ def generate_improvement_suggestions(weak_concepts, insights):
     """
     suggestions = []
     
-    total_short = sum(w.get('short_answers', 0) for w in weak_concepts.values())
-    total_low_vocab = sum(1 for w in weak_concepts.values() if w.get('low_vocab_diversity', False))
+    # Tally both weak-concept totals in a single pass
+    total_short = 0
+    total_low_vocab = 0
+    for w in weak_concepts.values():
+        total_short += w.get('short_answers', 0)
+        if w.get('low_vocab_diversity', False):
+            total_low_vocab += 1
     
     if total_short > 0:
         suggestions.append({
@@ -3,6 +3,11 @@ PDF Generator Module
 Generates PDF, Text and Excel reports for feedback export
 """
 
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
+
 from reportlab.lib import colors
 from reportlab.lib.pagesizes import letter, A4
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
@@ -12,25 +17,176 @@ from reportlab.lib.enums import TA_CENTER, TA_LEFT, TA_JUSTIFY
 import openpyxl
 from openpyxl.styles import Font, Alignment, PatternFill, Border, Side
 from openpyxl.utils import get_column_letter
-import os
-from datetime import datetime
+from openpyxl.worksheet.dimensions import ColumnDimension, DimensionHolder
+from openpyxl.cell import WriteOnlyCell
+
+
+# Excel styles are immutable: build each one once and share it across cells
+HEADER_FILL = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
+HEADER_FONT = Font(bold=True, color="FFFFFF", size=12)
+TITLE_FONT = Font(bold=True, size=16, color="8b5cf6")
+SECTION_FONT = Font(bold=True, size=14)
+THIN_BORDER = Border(
+    left=Side(style='thin'),
+    right=Side(style='thin'),
+    top=Side(style='thin'),
+    bottom=Side(style='thin')
+)
+ALIGN_CENTER = Alignment(horizontal='center')
+ALIGN_LEFT = Alignment(horizontal='left')
+ALIGN_CENTER_WRAP = Alignment(horizontal='center', wrap_text=True)
+
+# (label, key, unit) of each overall summary metric, shared by every report format
+SUMMARY_SPEC = (
+    ('Total Students', 'total_students', ''),
+    ('Total Questions', 'total_questions', ''),
+    ('Overall Similarity', 'overall_similarity', '%'),
+    ('Average Insight Score', 'avg_insight_score', ''),
+)
+
+# PDF table styles are shared by every summary / question table
+SUMMARY_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#374151')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
+])
+QUESTION_TABLE_STYLE = TableStyle([
+    ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
+    ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#3730a3')),
+    ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
+    ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
+    ('FONTSIZE', (0, 0), (-1, -1), 10),
+    ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
+    ('TOPPADDING', (0, 0), (-1, -1), 8),
+    ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#c7d2fe'))
+])
+
+# Write buffer of the text report file, so line writes coalesce into few syscalls
+TEXT_REPORT_BUFFER_SIZE = 65536
+
+# Column widths of each Excel sheet, from column A onwards
+SUMMARY_COLUMN_WIDTHS = (25, 20)
+QUESTION_COLUMN_WIDTHS = (12, 40, 15, 15, 18, 20, 12, 50)
+KEYWORD_COLUMN_WIDTHS = (12, 50, 18, 22)
+
+# (key, default) of each "Question Analysis" column after the question ID
+QUESTION_SHEET_FIELDS = (
+    ('question_text', ''),
+    ('total_responses', 0),
+    ('insight_score', 0),
+    ('confidence_score', 0),
+    ('understanding_level', 'N/A'),
+    ('risk_level', 'N/A'),
+    ('teaching_action', '')
+)
+
+
+def partition_weak_concepts(weak_concepts):
+    """
+    Split a question's weak concept signals by type, once per question
+    
+    Args:
+        weak_concepts: Weak concept signals of one question
+    
+    Returns:
+        Tuple of (flags, counts): boolean signals and integer counts
+    """
+    flags = {}
+    counts = {}
+    for concept, value in weak_concepts.items():
+        if isinstance(value, bool):
+            flags[concept] = value
+        elif isinstance(value, int):
+            counts[concept] = value
+    return flags, counts
+
+
+def question_flowables(q_id, q_data, heading_style, subheading_style, normal_style):
+    """
+    Build the PDF flowables for one question's analysis
+    
+    Args:
+        q_id: Question ID
+        q_data: Analysis data of the question
+        heading_style: Paragraph style of the question heading
+        subheading_style: Paragraph style of the section headings
+        normal_style: Paragraph style of the body text
+    
+    Returns:
+        List of flowables to add to the story
+    """
+    # Question stats
+    q_stats = [
+        ['Total Responses', str(q_data.get('total_responses', 0))],
+        ['Insight Score', str(q_data.get('insight_score', 0))],
+        ['Confidence Score', str(q_data.get('confidence_score', 0))],
+        ['Understanding Level', q_data.get('understanding_level', 'N/A')],
+        ['Risk Level', q_data.get('risk_level', 'N/A')],
+    ]
+    
+    q_table = Table(q_stats, colWidths=[2.5*inch, 2*inch])
+    q_table.setStyle(QUESTION_TABLE_STYLE)
+    
+    flowables = [
+        Paragraph(f"Question {q_id}: {q_data.get('question_text', '')}", heading_style),
+        q_table,
+        Spacer(1, 15),
+    ]
+    
+    # Teaching Recommendation
+    if 'teaching_action' in q_data:
+        flowables.extend((
+            Paragraph("Teaching Recommendation:", subheading_style),
+            Paragraph(q_data['teaching_action'], normal_style),
+            Spacer(1, 10),
+        ))
+    
+    # Common Keywords
+    if 'common_keywords' in q_data and q_data['common_keywords']:
+        flowables.extend((
+            Paragraph("Common Keywords:", subheading_style),
+            Paragraph(", ".join(q_data['common_keywords']), normal_style),
+            Spacer(1, 10),
+        ))
+    
+    # Weak Concepts
+    if 'weak_concepts' in q_data:
+        flags, counts = partition_weak_concepts(q_data['weak_concepts'])
+        flowables.append(Paragraph("Areas Needing Attention:", subheading_style))
+        flowables.extend(
+            Paragraph(f"• {value} short answers detected", normal_style)
+            for value in counts.values() if value > 0
+        )
+        flowables.extend(
+            Paragraph(f"• {concept.replace('_', ' ').title()}", normal_style)
+            for concept, value in flags.items() if value
+        )
+        flowables.append(Spacer(1, 10))
+    
+    flowables.append(Spacer(1, 10))
+    return flowables
 
 
-def create_pdf_report(data, output_path, teacher_name):
+def create_pdf_report(data, output, teacher_name):
     """
     Create a PDF report from analysis data
     
     Args:
         data: Dictionary containing all analysis data
-        output_path: Path to save PDF
+        output: Path or binary file-like object to write the PDF to
         teacher_name: Name of the teacher
     
     Returns:
-        Path to generated PDF
+        The output the PDF was written to
     """
     # Create document
     doc = SimpleDocTemplate(
-        output_path,
+        output,
         pagesize=A4,
         rightMargin=72,
         leftMargin=72,
@@ -95,79 +251,19 @@ def create_pdf_report(data, output_path, teacher_name):
         
         # Summary table
         summary_data = [
-            ['Total Students', str(summary.get('total_students', 0))],
-            ['Total Questions', str(summary.get('total_questions', 0))],
-            ['Overall Similarity', f"{summary.get('overall_similarity', 0)}%"],
-            ['Average Insight Score', f"{summary.get('avg_insight_score', 0)}"],
+            [label, f"{summary.get(key, 0)}{unit}"]
+            for label, key, unit in SUMMARY_SPEC
         ]
         
         summary_table = Table(summary_data, colWidths=[2.5*inch, 2*inch])
-        summary_table.setStyle(TableStyle([
-            ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#f3f4f6')),
-            ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#374151')),
-            ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-            ('FONTNAME', (0, 0), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 0), (-1, -1), 10),
-            ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-            ('TOPPADDING', (0, 0), (-1, -1), 8),
-            ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#e5e7eb'))
-        ]))
+        summary_table.setStyle(SUMMARY_TABLE_STYLE)
         story.append(summary_table)
         story.append(Spacer(1, 20))
     
     # Question-wise Analysis
     if 'questions' in data:
         for q_id, q_data in data['questions'].items():
-            story.append(Paragraph(f"Question {q_id}: {q_data.get('question_text', '')}", heading_style))
-            
-            # Question stats
-            q_stats = [
-                ['Total Responses', str(q_data.get('total_responses', 0))],
-                ['Insight Score', str(q_data.get('insight_score', 0))],
-                ['Confidence Score', str(q_data.get('confidence_score', 0))],
-                ['Understanding Level', q_data.get('understanding_level', 'N/A')],
-                ['Risk Level', q_data.get('risk_level', 'N/A')],
-            ]
-            
-            q_table = Table(q_stats, colWidths=[2.5*inch, 2*inch])
-            q_table.setStyle(TableStyle([
-                ('BACKGROUND', (0, 0), (0, -1), colors.HexColor('#e0e7ff')),
-                ('TEXTCOLOR', (0, 0), (-1, -1), colors.HexColor('#3730a3')),
-                ('ALIGN', (0, 0), (-1, -1), 'LEFT'),
-                ('FONTNAME', (0, 0), (-1, -1), 'Helvetica-Bold'),
-                ('FONTSIZE', (0, 0), (-1, -1), 10),
-                ('BOTTOMPADDING', (0, 0), (-1, -1), 8),
-                ('TOPPADDING', (0, 0), (-1, -1), 8),
-                ('GRID', (0, 0), (-1, -1), 1, colors.HexColor('#c7d2fe'))
-            ]))
-            story.append(q_table)
-            story.append(Spacer(1, 15))
-            
-            # Teaching Recommendation
-            if 'teaching_action' in q_data:
-                story.append(Paragraph("Teaching Recommendation:", subheading_style))
-                story.append(Paragraph(q_data['teaching_action'], normal_style))
-                story.append(Spacer(1, 10))
-            
-            # Common Keywords
-            if 'common_keywords' in q_data and q_data['common_keywords']:
-                story.append(Paragraph("Common Keywords:", subheading_style))
-                keywords = ", ".join(q_data['common_keywords'])
-                story.append(Paragraph(keywords, normal_style))
-                story.append(Spacer(1, 10))
-            
-            # Weak Concepts
-            if 'weak_concepts' in q_data:
-                story.append(Paragraph("Areas Needing Attention:", subheading_style))
-                for concept, value in q_data['weak_concepts'].items():
-                    if isinstance(value, bool) and value:
-                        concept_name = concept.replace('_', ' ').title()
-                        story.append(Paragraph(f"• {concept_name}", normal_style))
-                    elif isinstance(value, int) and value > 0:
-                        story.append(Paragraph(f"• {value} short answers detected", normal_style))
-                story.append(Spacer(1, 10))
-            
-            story.append(Spacer(1, 10))
+            story.extend(question_flowables(q_id, q_data, heading_style, subheading_style, normal_style))
     
     # Footer
     story.append(Spacer(1, 30))
@@ -179,243 +275,298 @@ def create_pdf_report(data, output_path, teacher_name):
     # Build PDF
     doc.build(story)
     
-    return output_path
+    return output
 
 
-def generate_text_report(data, output_path, teacher_name):
+def iter_text_report_lines(data, teacher_name):
     """
-    Generate a plain text report
+    Yield the lines of the plain text report one at a time
     
     Args:
         data: Dictionary containing all analysis data
-        output_path: Path to save text file
         teacher_name: Name of the teacher
     
-    Returns:
-        Path to generated text file
+    Yields:
+        Report lines without trailing newlines
     """
-    lines = []
     
     # Header
-    lines.append("=" * 60)
-    lines.append("ASSIGNMENT ANALYTICS REPORT")
-    lines.append("=" * 60)
-    lines.append("")
-    lines.append(f"Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}")
-    lines.append(f"Teacher: {teacher_name}")
-    lines.append("")
+    yield "=" * 60
+    yield "ASSIGNMENT ANALYTICS REPORT"
+    yield "=" * 60
+    yield ""
+    yield f"Generated: {datetime.now().strftime('%B %d, %Y at %H:%M')}"
+    yield f"Teacher: {teacher_name}"
+    yield ""
     
     # Overall Summary
     if 'overall_summary' in data:
-        lines.append("-" * 60)
-        lines.append("OVERALL SUMMARY")
-        lines.append("-" * 60)
+        yield "-" * 60
+        yield "OVERALL SUMMARY"
+        yield "-" * 60
         summary = data['overall_summary']
-        lines.append(f"Total Students: {summary.get('total_students', 0)}")
-        lines.append(f"Total Questions: {summary.get('total_questions', 0)}")
-        lines.append(f"Overall Similarity: {summary.get('overall_similarity', 0)}%")
-        lines.append(f"Average Insight Score: {summary.get('avg_insight_score', 0)}")
-        lines.append("")
+        for label, key, unit in SUMMARY_SPEC:
+            yield f"{label}: {summary.get(key, 0)}{unit}"
+        yield ""
     
     # Question-wise Analysis
     if 'questions' in data:
         for q_id, q_data in data['questions'].items():
-            lines.append("-" * 60)
-            lines.append(f"QUESTION {q_id}: {q_data.get('question_text', '')}")
-            lines.append("-" * 60)
-            lines.append(f"Total Responses: {q_data.get('total_responses', 0)}")
-            lines.append(f"Insight Score: {q_data.get('insight_score', 0)}")
-            lines.append(f"Confidence Score: {q_data.get('confidence_score', 0)}")
-            lines.append(f"Understanding Level: {q_data.get('understanding_level', 'N/A')}")
-            lines.append(f"Risk Level: {q_data.get('risk_level', 'N/A')}")
-            lines.append("")
+            yield "-" * 60
+            yield f"QUESTION {q_id}: {q_data.get('question_text', '')}"
+            yield "-" * 60
+            yield f"Total Responses: {q_data.get('total_responses', 0)}"
+            yield f"Insight Score: {q_data.get('insight_score', 0)}"
+            yield f"Confidence Score: {q_data.get('confidence_score', 0)}"
+            yield f"Understanding Level: {q_data.get('understanding_level', 'N/A')}"
+            yield f"Risk Level: {q_data.get('risk_level', 'N/A')}"
+            yield ""
             
             if 'teaching_action' in q_data:
-                lines.append("TEACHING RECOMMENDATION:")
-                lines.append(q_data['teaching_action'])
-                lines.append("")
+                yield "TEACHING RECOMMENDATION:"
+                yield q_data['teaching_action']
+                yield ""
             
             if 'common_keywords' in q_data and q_data['common_keywords']:
-                lines.append("COMMON KEYWORDS:")
-                lines.append(", ".join(q_data['common_keywords']))
-                lines.append("")
+                yield "COMMON KEYWORDS:"
+                yield ", ".join(q_data['common_keywords'])
+                yield ""
             
             if 'weak_concepts' in q_data:
-                lines.append("AREAS NEEDING ATTENTION:")
-                for concept, value in q_data['weak_concepts'].items():
-                    if isinstance(value, bool) and value:
-                        lines.append(f"  - {concept.replace('_', ' ').title()}")
-                    elif isinstance(value, int) and value > 0:
-                        lines.append(f"  - {value} short answers detected")
-                lines.append("")
-    
-    lines.append("=" * 60)
-    lines.append("Generated by AI Assignment Analytics System")
-    lines.append("=" * 60)
-    
-    # Write to file
-    with open(output_path, 'w', encoding='utf-8') as f:
-        f.write('\n'.join(lines))
-    
-    return output_path
+                yield "AREAS NEEDING ATTENTION:"
+                flags, counts = partition_weak_concepts(q_data['weak_concepts'])
+                for value in counts.values():
+                    if value > 0:
+                        yield f"  - {value} short answers detected"
+                for concept, value in flags.items():
+                    if value:
+                        yield f"  - {concept.replace('_', ' ').title()}"
+                yield ""
+    
+    yield "=" * 60
+    yield "Generated by AI Assignment Analytics System"
+    yield "=" * 60
 
 
-def create_excel_report(data, output_path, teacher_name):
+def generate_text_report(data, output, teacher_name):
+    """
+    Generate a plain text report
+    
+    Args:
+        data: Dictionary containing all analysis data
+        output: Path or binary file-like object to write the report to
+        teacher_name: Name of the teacher
+    
+    Returns:
+        The output the report was written to
+    """
+    report_lines = (line + '\n' for line in iter_text_report_lines(data, teacher_name))
+    
+    # Stream lines to file or binary buffer
+    if isinstance(output, str):
+        with open(output, 'w', encoding='utf-8', buffering=TEXT_REPORT_BUFFER_SIZE) as f:
+            f.writelines(report_lines)
+    else:
+        stream = io.TextIOWrapper(output, encoding='utf-8')
+        try:
+            stream.writelines(report_lines)
+            stream.flush()
+        finally:
+            stream.detach()
+    
+    return output
+
+
+def create_excel_report(data, output, teacher_name):
     """
     Generate an Excel report with multiple sheets
     
     Args:
         data: Dictionary containing all analysis data
-        output_path: Path to save Excel file
+        output: Path or binary file-like object to write the workbook to
         teacher_name: Name of the teacher
     
     Returns:
-        Path to generated Excel file
+        The output the workbook was written to
     """
-    # Create workbook
-    wb = openpyxl.Workbook()
-    
-    # Styles
-    header_fill = PatternFill(start_color="6366f1", end_color="6366f1", fill_type="solid")
-    header_font = Font(bold=True, color="FFFFFF", size=12)
-    thin_border = Border(
-        left=Side(style='thin'),
-        right=Side(style='thin'),
-        top=Side(style='thin'),
-        bottom=Side(style='thin')
-    )
+    # Write-only workbook: rows are streamed out as they are appended
+    # instead of keeping the whole cell grid in memory
+    wb = openpyxl.Workbook(write_only=True)
+    
+    def styled_cell(ws, value, font=None, fill=None, border=None, alignment=None):
+        """Write-only cell with the given styles applied"""
+        cell = WriteOnlyCell(ws, value=value)
+        if font:
+            cell.font = font
+        if fill:
+            cell.fill = fill
+        if border:
+            cell.border = border
+        if alignment:
+            cell.alignment = alignment
+        return cell
+    
+    def set_column_widths(ws, widths):
+        """Replace the sheet's column dimensions in one assignment"""
+        dimensions = DimensionHolder(worksheet=ws)
+        for col_idx, width in enumerate(widths, 1):
+            dimensions[get_column_letter(col_idx)] = ColumnDimension(
+                ws, min=col_idx, max=col_idx, width=width
+            )
+        ws.column_dimensions = dimensions
+    
+    def bordered_row(ws, values):
+        """One row of write-only cells with the thin border"""
+        row = [WriteOnlyCell(ws, value=value) for value in values]
+        for cell in row:
+            cell.border = THIN_BORDER
+        return row
     
     # ============ Sheet 1: Summary ============
-    ws_summary = wb.active
-    ws_summary.title = "Summary"
+    ws_summary = wb.create_sheet("Summary")
+    
+    # Adjust column widths (must be set before any row is written)
+    set_column_widths(ws_summary, SUMMARY_COLUMN_WIDTHS)
     
     # Title
-    ws_summary.merge_cells('A1:D1')
-    ws_summary['A1'] = "Assignment Analytics Report"
-    ws_summary['A1'].font = Font(bold=True, size=16, color="8b5cf6")
-    ws_summary['A1'].alignment = Alignment(horizontal='center')
+    ws_summary.append([styled_cell(
+        ws_summary, "Assignment Analytics Report",
+        font=TITLE_FONT,
+        alignment=ALIGN_CENTER
+    )])
+    ws_summary.merged_cells.add('A1:D1')
+    ws_summary.append([])
     
     # Date and Teacher
-    ws_summary['A3'] = "Generated:"
-    ws_summary['B3'] = datetime.now().strftime("%B %d, %Y at %H:%M")
-    ws_summary['A4'] = "Teacher:"
-    ws_summary['B4'] = teacher_name
+    ws_summary.append(["Generated:", datetime.now().strftime("%B %d, %Y at %H:%M")])
+    ws_summary.append(["Teacher:", teacher_name])
+    ws_summary.append([])
     
     # Overall Summary
-    ws_summary['A6'] = "OVERALL SUMMARY"
-    ws_summary['A6'].font = Font(bold=True, size=14)
+    ws_summary.append([styled_cell(ws_summary, "OVERALL SUMMARY", font=SECTION_FONT)])
     
     if 'overall_summary' in data:
         summary = data['overall_summary']
         summary_headers = ['Metric', 'Value']
+        # Excel keeps unitless metrics as numbers
         summary_data = [
-            ['Total Students', summary.get('total_students', 0)],
-            ['Total Questions', summary.get('total_questions', 0)],
-            ['Overall Similarity', f"{summary.get('overall_similarity', 0)}%"],
-            ['Average Insight Score', summary.get('avg_insight_score', 0)],
+            [label, f"{summary.get(key, 0)}{unit}" if unit else summary.get(key, 0)]
+            for label, key, unit in SUMMARY_SPEC
         ]
         
         # Write headers
-        for col, header in enumerate(summary_headers, 1):
-            cell = ws_summary.cell(row=7, column=col)
-            cell.value = header
-            cell.font = header_font
-            cell.fill = header_fill
-            cell.alignment = Alignment(horizontal='center')
-            cell.border = thin_border
+        ws_summary.append([
+            styled_cell(ws_summary, header, font=HEADER_FONT, fill=HEADER_FILL,
+                        border=THIN_BORDER, alignment=ALIGN_CENTER)
+            for header in summary_headers
+        ])
         
         # Write data
-        for row_idx, row_data in enumerate(summary_data, 8):
-            for col_idx, value in enumerate(row_data, 1):
-                cell = ws_summary.cell(row=row_idx, column=col_idx)
-                cell.value = value
-                cell.border = thin_border
-                cell.alignment = Alignment(horizontal='center' if col_idx > 1 else 'left')
-    
-    # Adjust column widths
-    ws_summary.column_dimensions['A'].width = 25
-    ws_summary.column_dimensions['B'].width = 20
+        for row_data in summary_data:
+            ws_summary.append([
+                styled_cell(ws_summary, value, border=THIN_BORDER,
+                            alignment=ALIGN_CENTER if col_idx > 1 else ALIGN_LEFT)
+                for col_idx, value in enumerate(row_data, 1)
+            ])
     
     # ============ Sheet 2: Question Analysis ============
     ws_questions = wb.create_sheet("Question Analysis")
     
+    # Adjust column widths
+    set_column_widths(ws_questions, QUESTION_COLUMN_WIDTHS)
+    
     # Headers
     q_headers = ['Question ID', 'Question Text', 'Total Responses', 'Insight Score', 
                 'Confidence Score', 'Understanding Level', 'Risk Level', 'Teaching Recommendation']
     
-    for col, header in enumerate(q_headers, 1):
-        cell = ws_questions.cell(row=1, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center', wrap_text=True)
-        cell.border = thin_border
+    ws_questions.append([
+        styled_cell(ws_questions, header, font=HEADER_FONT, fill=HEADER_FILL,
+                    border=THIN_BORDER, alignment=ALIGN_CENTER_WRAP)
+        for header in q_headers
+    ])
     
-    # Data
+    # Data: each question is flattened into a tuple of plain values once,
+    # before any cell is built
     if 'questions' in data:
-        for row_idx, (q_id, q_data) in enumerate(data['questions'].items(), 2):
-            ws_questions.cell(row=row_idx, column=1).value = q_id
-            ws_questions.cell(row=row_idx, column=2).value = q_data.get('question_text', '')
-            ws_questions.cell(row=row_idx, column=3).value = q_data.get('total_responses', 0)
-            ws_questions.cell(row=row_idx, column=4).value = q_data.get('insight_score', 0)
-            ws_questions.cell(row=row_idx, column=5).value = q_data.get('confidence_score', 0)
-            ws_questions.cell(row=row_idx, column=6).value = q_data.get('understanding_level', 'N/A')
-            ws_questions.cell(row=row_idx, column=7).value = q_data.get('risk_level', 'N/A')
-            ws_questions.cell(row=row_idx, column=8).value = q_data.get('teaching_action', '')
-            
-            # Apply borders
-            for col in range(1, 9):
-                ws_questions.cell(row=row_idx, column=col).border = thin_border
-    
-    # Adjust column widths
-    ws_questions.column_dimensions['A'].width = 12
-    ws_questions.column_dimensions['B'].width = 40
-    ws_questions.column_dimensions['C'].width = 15
-    ws_questions.column_dimensions['D'].width = 15
-    ws_questions.column_dimensions['E'].width = 18
-    ws_questions.column_dimensions['F'].width = 20
-    ws_questions.column_dimensions['G'].width = 12
-    ws_questions.column_dimensions['H'].width = 50
+        question_rows = [
+            (q_id, *(q_data.get(key, default) for key, default in QUESTION_SHEET_FIELDS))
+            for q_id, q_data in data['questions'].items()
+        ]
+        for row in question_rows:
+            ws_questions.append(bordered_row(ws_questions, row))
     
     # ============ Sheet 3: Keywords & Weak Concepts ============
     ws_keywords = wb.create_sheet("Keywords & Concepts")
     
+    # Adjust column widths
+    set_column_widths(ws_keywords, KEYWORD_COLUMN_WIDTHS)
+    
     # Headers
     kw_headers = ['Question ID', 'Common Keywords', 'Short Answers Count', 'Low Vocabulary Diversity']
     
-    for col, header in enumerate(kw_headers, 1):
-        cell = ws_keywords.cell(row=1, column=col)
-        cell.value = header
-        cell.font = header_font
-        cell.fill = header_fill
-        cell.alignment = Alignment(horizontal='center')
-        cell.border = thin_border
+    ws_keywords.append([
+        styled_cell(ws_keywords, header, font=HEADER_FONT, fill=HEADER_FILL,
+                    border=THIN_BORDER, alignment=ALIGN_CENTER)
+        for header in kw_headers
+    ])
     
     # Data
     if 'questions' in data:
-        for row_idx, (q_id, q_data) in enumerate(data['questions'].items(), 2):
-            ws_keywords.cell(row=row_idx, column=1).value = q_id
-            
+        for q_id, q_data in data['questions'].items():
             # Keywords
             keywords = ", ".join(q_data.get('common_keywords', []))
-            ws_keywords.cell(row=row_idx, column=2).value = keywords
             
             # Weak concepts
             weak = q_data.get('weak_concepts', {})
-            ws_keywords.cell(row=row_idx, column=3).value = weak.get('short_answers', 0)
-            ws_keywords.cell(row=row_idx, column=4).value = "Yes" if weak.get('low_vocab_diversity', False) else "No"
+            row = [
+                q_id,
+                keywords,
+                weak.get('short_answers', 0),
+                "Yes" if weak.get('low_vocab_diversity', False) else "No"
+            ]
             
-            # Apply borders
-            for col in range(1, 5):
-                ws_keywords.cell(row=row_idx, column=col).border = thin_border
+            ws_keywords.append(bordered_row(ws_keywords, row))
+    
+    # Save workbook; a path gets the finished archive in one large write
+    # instead of the zip writer's many small ones
+    if isinstance(output, str):
+        buffer = io.BytesIO()
+        wb.save(buffer)
+        with open(output, 'wb') as f:
+            f.write(buffer.getbuffer())
+    else:
+        wb.save(output)
+    
+    return output
+
+
+def export_all_reports(data, out_dir, teacher_name):
+    """
+    Generate the PDF, text and Excel reports on three threads
     
-    # Adjust column widths
-    ws_keywords.column_dimensions['A'].width = 12
-    ws_keywords.column_dimensions['B'].width = 50
-    ws_keywords.column_dimensions['C'].width = 18
-    ws_keywords.column_dimensions['D'].width = 22
+    Each report is written to its own file, so the three generators share
+    nothing but the (read-only) data. ReportLab and openpyxl are mostly pure
+    Python and hold the GIL, so only their file writes overlap; the total
+    time is still about the sum of all three reports.
     
-    # Save workbook
-    wb.save(output_path)
+    Args:
+        data: Dictionary containing all analysis data
+        out_dir: Directory to write the reports to
+        teacher_name: Name of the teacher
     
-    return output_path
+    Returns:
+        Dictionary mapping 'pdf', 'text' and 'excel' to the generated paths
+    """
+    base_name = f"assignment_report_{datetime.now().strftime('%Y%m%d_%H%M%S')}"
+    jobs = {
+        'pdf': (create_pdf_report, os.path.join(out_dir, f"{base_name}.pdf")),
+        'text': (generate_text_report, os.path.join(out_dir, f"{base_name}.txt")),
+        'excel': (create_excel_report, os.path.join(out_dir, f"{base_name}.xlsx")),
+    }
+    
+    with ThreadPoolExecutor(max_workers=len(jobs)) as executor:
+        futures = {
+            kind: executor.submit(generator, data, path, teacher_name)
+            for kind, (generator, path) in jobs.items()
+        }
+        return {kind: future.result() for kind, future in futures.items()}
@@ -1,12 +1,41 @@
+import io
+import re
 import json
 import csv
 import openpyxl
 from collections import defaultdict
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Line patterns for parse_pdf, compiled once at import
+STUDENT_ID_PATTERN = re.compile(r'(?:^|[,\s]ID[:\s]?|student[_\s]?id[:\s]?|ID[:\s]*)(\d+)', re.IGNORECASE)
+STUDENT_NAME_PATTERN = re.compile(r'(?:Name[:\s]*|Student[:\s]*)([A-Za-z\s\.]+)', re.IGNORECASE)
+QUESTION_ID_PATTERN = re.compile(r'(?:Q(?:uestion)?[_\s]?(?:ID)?[:\s]*|#?Q?[:\s]?)([A-Za-z0-9]+)', re.IGNORECASE)
+QUESTION_TEXT_PATTERN = re.compile(r'(?:Question|Q)[^:]*[:\s]*(.+?)(?:\s*Answer|\s*Ans|$)', re.IGNORECASE)
+ANSWER_PATTERN = re.compile(r'(?:Answer|Ans|Response)[:\s]*(.+)', re.IGNORECASE)
+LABEL_PREFIX_PATTERN = re.compile(r'^(?:Student|Q|ID|Name|#)\s*', re.IGNORECASE)
+HEADER_LINE_PATTERN = re.compile(r'^(?:student|question|answer|name|id|#)', re.IGNORECASE)
+NUMBERED_LINE_PATTERN = re.compile(r'^\d+[\s,;]')
+FIELD_SEPARATOR_PATTERN = re.compile(r'[,;\t|]+')
+
+
 def parse_csv(file):
-    decoded = file.read().decode("utf-8").splitlines()
-    reader = csv.DictReader(decoded)
+    # Decode and parse the upload line by line instead of reading, decoding
+    # and splitting the whole file up front
+    text = io.TextIOWrapper(file, encoding="utf-8", newline="")
+    try:
+        return parse_csv_rows(csv.reader(text))
+    finally:
+        # Leave the underlying upload stream open for its owner
+        text.detach()
+
 
-    if not reader.fieldnames:
+def parse_csv_rows(reader):
+    fieldnames = next(reader, None)
+    if not fieldnames:
         raise ValueError("Uploaded CSV file is empty")
 
     required_columns = {
@@ -16,30 +45,44 @@ def parse_csv(file):
         "question",
         "answer"
     }
-    if not required_columns.issubset(set(reader.fieldnames)):
+    if not required_columns.issubset(set(fieldnames)):
         raise ValueError(
             f"CSV must contain columns: {required_columns}"
         )
 
+    # Resolve column positions once; rows are read as plain lists
+    columns = {name: idx for idx, name in enumerate(fieldnames)}
+    student_id_idx = columns["student_id"]
+    student_name_idx = columns["student_name"]
+    question_id_idx = columns["question_id"]
+    question_idx = columns["question"]
+    answer_idx = columns["answer"]
+    width = max(columns[name] for name in required_columns) + 1
+
     data = []
 
     for row in reader:
-        if not row["answer"].strip():
+        # Skip blank rows and rows cut short before the required columns
+        if len(row) < width:
+            continue
+
+        answer = row[answer_idx].strip()
+        if not answer:
             continue 
 
         data.append({
-            "student_id": row["student_id"].strip(),
-            "student_name": row["student_name"].strip(),
-            "question_id": row["question_id"].strip(),
-            "question": row["question"].strip(),
-            "answer": row["answer"].strip()
+            "student_id": row[student_id_idx].strip(),
+            "student_name": row[student_name_idx].strip(),
+            "question_id": row[question_id_idx].strip(),
+            "question": row[question_idx].strip(),
+            "answer": answer
         })
 
     return data
 
 def parse_json(file):
     try:
-        data = json.load(file)
+        data = orjson.loads(file.read()) if orjson else json.load(file)
     except Exception:
         raise ValueError("Invalid JSON file")
 
@@ -57,7 +100,7 @@ def parse_json(file):
     parsed = []
 
     for item in data:
-        if not required_keys.issubset(set(item.keys())):
+        if not required_keys <= item.keys():
             raise ValueError(
                 f"Each JSON object must contain: {required_keys}"
             )
@@ -78,11 +121,16 @@ def parse_json(file):
 def parse_excel(file):
     """Parse Excel (.xlsx) files"""
     try:
-        workbook = openpyxl.load_workbook(file)
+        # Stream rows from the sheet XML; only cached values are needed
+        workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    except Exception as e:
+        raise ValueError(f"Invalid Excel file: {str(e)}")
+    
+    try:
         sheet = workbook.active
         
         # Get headers from first row
-        headers = [cell.value for cell in sheet[1]]
+        headers = next(sheet.iter_rows(min_row=1, max_row=1, values_only=True), None)
         
         if not headers:
             raise ValueError("Uploaded Excel file is empty")
@@ -111,12 +159,18 @@ def parse_excel(file):
             raise ValueError(f"Excel must contain columns: {required_columns}")
         
         data = []
+        row_width = len(headers)
         
         # Read rows starting from second row
         for row in sheet.iter_rows(min_row=2, values_only=True):
             if not row or not any(row):
                 continue
             
+            # Read-only rows are only padded to the sheet's declared dimension;
+            # without one, trailing blank cells are missing
+            if len(row) < row_width:
+                row = row + (None,) * (row_width - len(row))
+            
             student_id = row[header_map["student_id"]]
             student_name = row[header_map["student_name"]]
             question_id = row[header_map["question_id"]]
@@ -139,142 +193,188 @@ def parse_excel(file):
         
     except Exception as e:
         raise ValueError(f"Invalid Excel file: {str(e)}")
+    finally:
+        # Read-only workbooks keep the archive open until closed
+        workbook.close()
 
 
-def parse_pdf(file):
-    """Parse PDF files containing student assignment data using pdfminer.six"""
+def iter_pdf_lines(pdf_content):
+    """
+    Yield the text lines of a PDF page by page, using PDFium when available
+    and pdfminer.six otherwise; only one page's text is held at a time
+    """
     try:
-        from pdfminer.high_level import extract_text
-        import re
-        import io
-        
-        # Read PDF content and extract text
-        pdf_content = file.read()
-        pdf_file = io.BytesIO(pdf_content)
-        full_text = extract_text(pdf_file)
+        import pypdfium2 as pdfium
+    except ImportError:
+        from pdfminer.high_level import extract_pages
+        from pdfminer.layout import LTTextContainer
         
-        if not full_text.strip():
-            raise ValueError("PDF appears to be empty or contains no extractable text")
+        for page_layout in extract_pages(io.BytesIO(pdf_content)):
+            for element in page_layout:
+                if isinstance(element, LTTextContainer):
+                    for text_line in element:
+                        yield text_line.get_text()
+        return
+    
+    pdf = pdfium.PdfDocument(pdf_content)
+    try:
+        for page in pdf:
+            textpage = page.get_textpage()
+            page_text = textpage.get_text_range()
+            textpage.close()
+            page.close()
+            # PDFium ends lines with \r\n; the trailing \r is stripped per line
+            yield from page_text.split('\n')
+    finally:
+        pdf.close()
+
+
+def parse_structured_line(line, current_entry, data):
+    """Feed one stripped line to the labelled-field parser; returns the entry in progress"""
+    # Try to extract student ID (typically a number at start or after "ID:")
+    student_id_match = STUDENT_ID_PATTERN.search(line)
+    if student_id_match:
+        if current_entry and 'answer' in current_entry:
+            data.append(current_entry)
+        return {'student_id': student_id_match.group(1)}
+    
+    # If we have a student_id, try to get name (usually comes after ID)
+    if 'student_id' in current_entry and 'student_name' not in current_entry:
+        # Look for name pattern (text without numbers, after ID or Student)
+        name_match = STUDENT_NAME_PATTERN.search(line)
+        if name_match:
+            name = name_match.group(1).strip()
+            if name and len(name) < 50:
+                current_entry['student_name'] = name
+                return current_entry
+    
+    # Try to extract question ID (Q1, Q2, Question 1, etc.)
+    question_id_match = QUESTION_ID_PATTERN.search(line)
+    if question_id_match and 'student_id' in current_entry:
+        qid = question_id_match.group(1).strip()
+        if qid and qid.lower() not in ['id', 'name', 'answer']:
+            current_entry['question_id'] = qid
+            return current_entry
+    
+    # Try to extract question text
+    if 'question_id' in current_entry and 'question' not in current_entry:
+        # Question text typically comes after "Question:" or "Q:"
+        q_text_match = QUESTION_TEXT_PATTERN.search(line)
+        if q_text_match:
+            current_entry['question'] = q_text_match.group(1).strip()
+            return current_entry
+    
+    # Try to extract answer
+    if 'question' in current_entry and 'answer' not in current_entry:
+        ans_match = ANSWER_PATTERN.search(line)
+        if ans_match:
+            current_entry['answer'] = ans_match.group(1).strip()
+            return current_entry
         
-        data = []
-        lines = full_text.split('\n')
+        # If no "Answer:" prefix, treat long text as answer
+        if len(line) > 10 and not LABEL_PREFIX_PATTERN.match(line):
+            current_entry['answer'] = line
+            return current_entry
+    
+    # If we have all required fields, save the entry
+    if len(current_entry) >= 5 and 'answer' in current_entry:
+        data.append(current_entry)
+        return {}
+    
+    return current_entry
+
+
+def parse_separated_line(line):
+    """Parse one 'id, name, question_id, question, answer' line; returns None if it isn't one"""
+    parts = FIELD_SEPARATOR_PATTERN.split(line)
+    if len(parts) >= 5:
+        student_id = parts[0].strip()
+        # Check if first part looks like a student ID (numeric)
+        if student_id.isdigit() and len(student_id) <= 8:
+            entry = {
+                'student_id': student_id,
+                'student_name': parts[1].strip(),
+                'question_id': parts[2].strip(),
+                'question': parts[3].strip(),
+                'answer': parts[4].strip()
+            }
+            if entry['answer']:
+                return entry
+    return None
+
+
+def parse_numbered_line(line, student_counter, question_counter):
+    """Parse one stripped line starting with a student number; returns None if it isn't one"""
+    # Skip headers
+    if HEADER_LINE_PATTERN.match(line):
+        return None
+    
+    # If line starts with a number, it might be student ID
+    if NUMBERED_LINE_PATTERN.match(line):
+        parts = FIELD_SEPARATOR_PATTERN.split(line)
+        if len(parts) >= 2:
+            # Try to parse as: ID, Name, QID, Question, Answer
+            entry = {
+                'student_id': parts[0].strip(),
+                'student_name': parts[1].strip() if len(parts) > 1 else f"Student{student_counter}",
+                'question_id': parts[2].strip() if len(parts) > 2 else str(question_counter),
+                'question': parts[3].strip() if len(parts) > 3 else f"Question {question_counter}",
+                'answer': parts[4].strip() if len(parts) > 4 else (parts[2].strip() if len(parts) > 2 else "")
+            }
+            if entry['answer']:
+                return entry
+    return None
+
+
+def parse_pdf(file):
+    """Parse PDF files containing student assignment data"""
+    try:
+        # Read PDF content; its text is extracted and parsed page by page
+        pdf_content = file.read()
         
-        # Strategy 1: Look for structured patterns in each line
+        # All three strategies run in a single pass over the lines; a
+        # fallback strategy stops as soon as a higher-priority one has
+        # produced entries, since its results would be discarded anyway
+        structured = []
+        separated = []
+        numbered = []
         current_entry = {}
+        student_counter = 1
+        question_counter = 1
+        has_text = False
         
-        for line in lines:
-            line = line.strip()
-            if not line:
+        for raw_line in iter_pdf_lines(pdf_content):
+            line = raw_line.strip()
+            if line:
+                has_text = True
+                # Strategy 1: Look for structured patterns in each line
+                current_entry = parse_structured_line(line, current_entry, structured)
+            if structured:
                 continue
             
-            # Try to extract student ID (typically a number at start or after "ID:")
-            student_id_match = re.search(r'(?:^|[,\s]ID[:\s]?|student[_\s]?id[:\s]?|ID[:\s]*)(\d+)', line, re.IGNORECASE)
-            if student_id_match:
-                if current_entry and 'answer' in current_entry:
-                    data.append(current_entry)
-                current_entry = {'student_id': student_id_match.group(1)}
+            # Strategy 2: Comma/tab separated format
+            entry = parse_separated_line(raw_line)
+            if entry:
+                separated.append(entry)
+            if separated or not line:
                 continue
             
-            # If we have a student_id, try to get name (usually comes after ID)
-            if 'student_id' in current_entry and 'student_name' not in current_entry:
-                # Look for name pattern (text without numbers, after ID or Student)
-                name_match = re.search(r'(?:Name[:\s]*|Student[:\s]*)([A-Za-z\s\.]+)', line, re.IGNORECASE)
-                if name_match:
-                    name = name_match.group(1).strip()
-                    if name and len(name) < 50:
-                        current_entry['student_name'] = name
-                        continue
-            
-            # Try to extract question ID (Q1, Q2, Question 1, etc.)
-            question_id_match = re.search(r'(?:Q(?:uestion)?[_\s]?(?:ID)?[:\s]*|#?Q?[:\s]?)([A-Za-z0-9]+)', line, re.IGNORECASE)
-            if question_id_match and 'student_id' in current_entry:
-                qid = question_id_match.group(1).strip()
-                if qid and qid.lower() not in ['id', 'name', 'answer']:
-                    current_entry['question_id'] = qid
-                    continue
-            
-            # Try to extract question text
-            if 'question_id' in current_entry and 'question' not in current_entry:
-                # Question text typically comes after "Question:" or "Q:"
-                q_text_match = re.search(r'(?:Question|Q)[^:]*[:\s]*(.+?)(?:\s*Answer|\s*Ans|$)', line, re.IGNORECASE)
-                if q_text_match:
-                    current_entry['question'] = q_text_match.group(1).strip()
-                    continue
-            
-            # Try to extract answer
-            if 'question' in current_entry and 'answer' not in current_entry:
-                ans_match = re.search(r'(?:Answer|Ans|Response)[:\s]*(.+)', line, re.IGNORECASE)
-                if ans_match:
-                    current_entry['answer'] = ans_match.group(1).strip()
-                    continue
-                
-                # If no "Answer:" prefix, treat long text as answer
-                if len(line) > 10 and not re.match(r'^(?:Student|Q|ID|Name|#)\s*', line, re.IGNORECASE):
-                    current_entry['answer'] = line
-                    continue
-            
-            # If we have all required fields, save the entry
-            if len(current_entry) >= 5 and 'answer' in current_entry:
-                data.append(current_entry)
-                current_entry = {}
+            # Strategy 3: Simple sequential parsing - assume PDF has Q&A in sequence
+            entry = parse_numbered_line(line, student_counter, question_counter)
+            if entry:
+                numbered.append(entry)
+                student_counter += 1
+                if question_counter < student_counter:
+                    question_counter = student_counter
+        
+        if not has_text:
+            raise ValueError("PDF appears to be empty or contains no extractable text")
         
         # Don't forget the last entry
         if current_entry and len(current_entry) >= 5 and 'answer' in current_entry:
-            data.append(current_entry)
-        
-        # Strategy 2: If no structured data found, try comma/tab separated format
-        if not data:
-            for line in lines:
-                parts = re.split(r'[,;\t|]+', line)
-                if len(parts) >= 5:
-                    student_id = parts[0].strip()
-                    # Check if first part looks like a student ID (numeric)
-                    if student_id.isdigit() and len(student_id) <= 8:
-                        try:
-                            entry = {
-                                'student_id': student_id,
-                                'student_name': parts[1].strip(),
-                                'question_id': parts[2].strip(),
-                                'question': parts[3].strip(),
-                                'answer': parts[4].strip()
-                            }
-                            if entry['answer']:
-                                data.append(entry)
-                        except:
-                            pass
+            structured.append(current_entry)
         
-        # Strategy 3: Simple sequential parsing - assume PDF has Q&A in sequence
-        if not data:
-            # Group lines by looking for patterns
-            student_counter = 1
-            question_counter = 1
-            
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-                
-                # Skip headers
-                if re.match(r'^(?:student|question|answer|name|id|#)', line, re.IGNORECASE):
-                    continue
-                
-                # If line starts with a number, it might be student ID
-                if re.match(r'^\d+[\s,;]', line):
-                    parts = re.split(r'[,;\t|]+', line)
-                    if len(parts) >= 2:
-                        # Try to parse as: ID, Name, QID, Question, Answer
-                        entry = {
-                            'student_id': parts[0].strip(),
-                            'student_name': parts[1].strip() if len(parts) > 1 else f"Student{student_counter}",
-                            'question_id': parts[2].strip() if len(parts) > 2 else str(question_counter),
-                            'question': parts[3].strip() if len(parts) > 3 else f"Question {question_counter}",
-                            'answer': parts[4].strip() if len(parts) > 4 else (parts[2].strip() if len(parts) > 2 else "")
-                        }
-                        if entry['answer']:
-                            data.append(entry)
-                            student_counter += 1
-                            if question_counter < student_counter:
-                                question_counter = student_counter
+        data = structured or separated or numbered
         
         if not data:
             raise ValueError(